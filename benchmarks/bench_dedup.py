@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Benchmark the seen-hashes store against the legacy set of hex strings
+(seen_hashes.json) on synthetic histories of several sizes.
+
+For each store, reports load time, Python heap after load (tracemalloc;
+memory-mapped pages are not counted, see the file size column instead)
+and the cost of a lookup for new offers (misses) and known offers (hits).
+
+    python benchmarks/bench_dedup.py
+    python benchmarks/bench_dedup.py --sizes 25000 1000000 --error-rate 0.001
+"""
+
+import argparse
+import json
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from utils.dedup import DeduplicationManager  # noqa: E402
+
+
+def _measure_load(load):
+    tracemalloc.start()
+    start = time.perf_counter()
+    store = load()
+    elapsed = time.perf_counter() - start
+    heap, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return store, elapsed, heap
+
+
+def _lookup_ns(store, keys):
+    start = time.perf_counter()
+    for key in keys:
+        key in store  # noqa: B015
+    return (time.perf_counter() - start) / len(keys) * 1e9
+
+
+def _file_size(directory, pattern):
+    return sum(p.stat().st_size for p in Path(directory).glob(pattern))
+
+
+def run(size, lookups, error_rate, seed=0):
+    rng = random.Random(seed)
+    history = [rng.getrandbits(64) for _ in range(size)]
+    hits = rng.sample(history, min(lookups, size))
+    misses = [rng.getrandbits(64) for _ in range(lookups)]
+    hex_history = [f"{h:016x}" for h in history]
+    rows = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy = Path(tmp) / "seen_hashes.json"
+        legacy.write_text(json.dumps(sorted(hex_history), indent=2))
+        json_size = legacy.stat().st_size
+
+        store, load_s, heap = _measure_load(lambda: set(json.loads(legacy.read_text())))
+        rows.append(("json set[str]", json_size, load_s, heap,
+                     _lookup_ns(store, [f"{h:016x}" for h in misses]),
+                     _lookup_ns(store, [f"{h:016x}" for h in hits]), None))
+        del store
+
+        # Migrate once, then measure warm loads
+        DeduplicationManager(Path(tmp) / "seen_hashes.bin").close()
+        for name, rate in [("mmap + bisect", None), (f"bloom {error_rate:g} + mmap", error_rate)]:
+            if rate:
+                DeduplicationManager(Path(tmp) / "seen_hashes.bin", bloom_error_rate=rate).save()
+            store, load_s, heap = _measure_load(
+                lambda: DeduplicationManager(Path(tmp) / "seen_hashes.bin", bloom_error_rate=rate)
+            )
+            false_positive = None
+            if store.bloom is not None:
+                false_positive = sum(1 for h in misses if h in store.bloom) / len(misses)
+            rows.append((name, _file_size(tmp, "seen_hashes.b*"), load_s, heap,
+                         _lookup_ns(store, misses), _lookup_ns(store, hits), false_positive))
+            store.close()
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the seen-hashes store")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[25_000, 250_000, 1_000_000])
+    parser.add_argument("--lookups", type=int, default=100_000)
+    parser.add_argument("--error-rate", type=float, default=0.01)
+    args = parser.parse_args(argv)
+
+    for size in args.sizes:
+        print(f"\n{size:,} hashes")
+        print(f"  {'store':<22}{'on disk':>10}{'load':>10}{'heap':>10}{'miss':>10}{'hit':>10}{'fp rate':>10}")
+        for name, disk, load_s, heap, miss_ns, hit_ns, fp in run(size, args.lookups, args.error_rate):
+            fp_text = f"{fp:.4f}" if fp is not None else "-"
+            print(f"  {name:<22}{disk / 1e6:>8.2f}MB{load_s * 1e3:>8.1f}ms{heap / 1e6:>8.2f}MB"
+                  f"{miss_ns:>8.0f}ns{hit_ns:>8.0f}ns{fp_text:>10}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Benchmark JobFilter over the historical CSV corpus.
+
+Times filter_and_score, the per-offer OfferText build, each sub-step
+(given the pre-built view, as the pipeline calls it) and the vectorized
+BatchJobFilter at several corpus scales,
+reports offers/second and peak memory, and compares throughput against the
+stored baseline (benchmarks/baseline_filter.json).
+
+    python benchmarks/bench_filter.py                    # compare with baseline
+    python benchmarks/bench_filter.py --scales 1 10 100
+    python benchmarks/bench_filter.py --update-baseline  # after an intended change
+"""
+
+import argparse
+import dataclasses
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.corpus import load_corpus, replicate  # noqa: E402
+from utils.filters import JobFilter, OfferText  # noqa: E402
+
+BASELINE_PATH = Path(__file__).resolve().parent / "baseline_filter.json"
+
+STEPS = [
+    "is_non_stage",
+    "is_excluded",
+    "is_location_excluded",
+    "compute_relevance_score",
+]
+
+
+def _time_step(fn, offers, views, repeat):
+    """Time a sub-step the way filter_and_score calls it: with the offer's pre-built view."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for offer, view in zip(offers, views):
+            fn(offer, view)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _time_views(offers, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for offer in offers:
+            OfferText.from_offer(offer)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _time_pipeline(job_filter, offers, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        job_filter.filter_and_score(offers)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _time_batch(frame, repeat):
+    from utils.batch_filter import BatchJobFilter
+
+    batch_filter = BatchJobFilter()
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        batch_filter.filter_and_score(frame)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _peak_memory(job_filter, offers):
+    tracemalloc.start()
+    job_filter.filter_and_score(offers)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def run(corpus, scales, repeat, batch=True):
+    job_filter = JobFilter()
+    results = {}
+    frame = None
+    if batch:
+        import pandas as pd
+        frame = pd.DataFrame([dataclasses.asdict(o) for o in corpus])
+    for scale in scales:
+        offers = replicate(corpus, scale)
+        n = len(offers)
+        timings = {"filter_and_score": _time_pipeline(job_filter, offers, repeat)}
+        timings["build_view"] = _time_views(offers, repeat)
+        views = [OfferText.from_offer(offer) for offer in offers]
+        for step in STEPS:
+            timings[step] = _time_step(getattr(job_filter, step), offers, views, repeat)
+        del views
+        if frame is not None:
+            import pandas as pd
+            timings["batch_filter_and_score"] = _time_batch(pd.concat([frame] * scale, ignore_index=True), repeat)
+        results[str(scale)] = {
+            "offers": n,
+            "offers_per_sec": {name: round(n / secs, 1) for name, secs in timings.items()},
+            "peak_memory_mb": round(_peak_memory(job_filter, offers) / 1024 / 1024, 2),
+        }
+    return results
+
+
+def report(results, baseline, tolerance):
+    """Print results next to the baseline; return the list of regressions."""
+    regressions = []
+    for scale, res in results.items():
+        print(f"\nScale x{scale} ({res['offers']} offers), peak memory {res['peak_memory_mb']} MB")
+        base = baseline.get(scale, {}).get("offers_per_sec", {})
+        for name, ops in res["offers_per_sec"].items():
+            line = f"  {name:<26}{ops:>14,.0f} offers/s"
+            if name in base:
+                ratio = ops / base[name]
+                line += f"   ({ratio:.2f}x baseline)"
+                if ratio < 1 - tolerance:
+                    line += "  REGRESSION"
+                    regressions.append(f"x{scale} {name}")
+            print(line)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark JobFilter over data/internships*.csv")
+    parser.add_argument("--data-dir", default=str(ROOT / "data"))
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10])
+    parser.add_argument("--repeat", type=int, default=1, help="best-of repetitions per timing")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="flag a regression when throughput drops by more than this fraction")
+    parser.add_argument("--no-batch", action="store_true", help="skip the vectorized BatchJobFilter timing")
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args(argv)
+
+    corpus = load_corpus(args.data_dir)
+    print(f"Loaded {len(corpus)} offers from {args.data_dir}")
+    results = run(corpus, args.scales, args.repeat, batch=not args.no_batch)
+
+    baseline = json.loads(BASELINE_PATH.read_text()) if BASELINE_PATH.exists() else {}
+    regressions = report(results, baseline, args.tolerance)
+
+    if args.update_baseline:
+        baseline.update(results)
+        BASELINE_PATH.write_text(json.dumps(baseline, indent=2) + "\n")
+        print(f"\nBaseline updated: {BASELINE_PATH}")
+        return 0
+    if regressions:
+        print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
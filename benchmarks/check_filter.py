@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Check that utils.filters.JobFilter makes exactly the same decisions as the
+original implementation (benchmarks/reference_filter.py) on every offer of
+the historical CSV corpus, and that the vectorized BatchJobFilter
+(utils/batch_filter.py) agrees with JobFilter.
+
+    python benchmarks/check_filter.py
+"""
+
+import argparse
+import dataclasses
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.corpus import load_corpus  # noqa: E402
+from benchmarks.reference_filter import ReferenceJobFilter  # noqa: E402
+from utils.filters import JobFilter  # noqa: E402
+
+CHECKS = [
+    "is_non_stage",
+    "is_excluded",
+    "is_location_excluded",
+    "is_location_accepted",
+    "is_internship",
+    "matches_keywords",
+    "detect_duration",
+    "compute_relevance_score",
+]
+
+
+def compare(corpus, max_examples=5):
+    """Return {check name: [(offer, expected, actual), ...]} for every mismatch."""
+    reference, candidate = ReferenceJobFilter(), JobFilter()
+    mismatches = {}
+    for offer in corpus:
+        for name in CHECKS:
+            expected = getattr(reference, name)(dataclasses.replace(offer))
+            actual = getattr(candidate, name)(dataclasses.replace(offer))
+            if expected != actual:
+                mismatches.setdefault(name, []).append((offer, expected, actual))
+
+    expected = reference.filter_and_score([dataclasses.replace(o) for o in corpus])
+    actual = candidate.filter_and_score([dataclasses.replace(o) for o in corpus])
+    expected_rows = [(o.url, o.title, o.duration, o.relevance_score) for o in expected]
+    actual_rows = [(o.url, o.title, o.duration, o.relevance_score) for o in actual]
+    if expected_rows != actual_rows:
+        diff = set(expected_rows) ^ set(actual_rows)
+        mismatches["filter_and_score"] = [(row, row in expected_rows, row in actual_rows) for row in diff]
+
+    for name, cases in mismatches.items():
+        print(f"{name}: {len(cases)} mismatch(es)")
+        for offer, exp, act in cases[:max_examples]:
+            print(f"    {offer!r}\n      expected={exp!r} actual={act!r}")
+    return mismatches
+
+
+def compare_batch(corpus, max_examples=5):
+    """Return the (url, title, duration, score) rows on which BatchJobFilter and JobFilter disagree."""
+    import pandas as pd
+    from utils.batch_filter import BatchJobFilter
+
+    df = pd.DataFrame([dataclasses.asdict(o) for o in corpus])
+    batch = BatchJobFilter().filter_and_score(df)
+    batch_rows = list(zip(batch["url"], batch["title"], batch["duration"], batch["relevance_score"]))
+
+    scalar = JobFilter().filter_and_score([dataclasses.replace(o) for o in corpus])
+    scalar_rows = [(o.url, o.title, o.duration or "", o.relevance_score) for o in scalar]
+
+    if batch_rows == scalar_rows:
+        return []
+    diff = sorted(set(batch_rows) ^ set(scalar_rows), key=str)
+    if not diff:
+        print("batch: same rows, different order")
+        return [("order", None, None)]
+    print(f"batch: {len(diff)} mismatch(es)")
+    for row in diff[:max_examples]:
+        print(f"    {row!r} scalar={row in scalar_rows} batch={row in batch_rows}")
+    return diff
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare JobFilter with the reference implementation")
+    parser.add_argument("--data-dir", default=str(ROOT / "data"))
+    args = parser.parse_args(argv)
+
+    corpus = load_corpus(args.data_dir)
+    mismatches = compare(corpus)
+    batch_mismatches = compare_batch(corpus)
+    if mismatches or batch_mismatches:
+        return 1
+    print(f"OK: {len(corpus)} offers, identical decisions and scores (scalar and batch)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
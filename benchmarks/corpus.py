@@ -0,0 +1,40 @@
+"""
+Historical offer corpus used by the benchmarks: every stored
+data/internships*.csv loaded back into JobOffer objects.
+"""
+
+import csv
+from pathlib import Path
+from typing import List
+
+from scrapers.base import JobOffer
+
+
+def _clean(value):
+    # pandas wrote missing values as empty strings or "nan"
+    return "" if value is None or value == "nan" else value
+
+
+def load_corpus(data_dir="data") -> List[JobOffer]:
+    offers = []
+    for path in sorted(Path(data_dir).glob("internships*.csv")):
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                offers.append(JobOffer(
+                    title=_clean(row.get("title")),
+                    company=_clean(row.get("company")),
+                    location=_clean(row.get("location")),
+                    url=_clean(row.get("url")),
+                    date_posted=_clean(row.get("date_posted")) or None,
+                    description_snippet=_clean(row.get("description_snippet")),
+                    source=_clean(row.get("source")),
+                    job_type=_clean(row.get("job_type")) or None,
+                    duration=_clean(row.get("duration")) or None,
+                    department=_clean(row.get("department")) or None,
+                ))
+    return offers
+
+
+def replicate(offers: List[JobOffer], factor: int) -> List[JobOffer]:
+    """Scale the corpus by repeating references (keeps the benchmark's own memory flat)."""
+    return offers * factor
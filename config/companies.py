@@ -43,6 +43,32 @@ COMPANIES = [
         "wday_path": "ubs/Find_a_job_at_UBS",
     },
 
+    # === Platform scrapers (JSON API first, HTML fallback) ===
+    {
+        "name": "Goldman Sachs",
+        "scraper_type": "goldman_avature",
+        "base_url": "https://higher.gs.com/results",
+        "search_url": "https://higher.gs.com/results",
+    },
+    {
+        "name": "JP Morgan",
+        "scraper_type": "oracle_hcm",
+        "base_url": "https://jpmc.fa.oraclecloud.com/hcmUI/CandidateExperience/en/sites/CX_1001/jobs",
+        "search_url": "https://jpmc.fa.oraclecloud.com/hcmUI/CandidateExperience/en/sites/CX_1001/jobs",
+    },
+    {
+        "name": "Lazard",
+        "scraper_type": "talentlink",
+        "base_url": "https://lazard-careers.tal.net/vx/lang-en-GB/appcentre-ext/brand-4/candidate/jobboard/vacancy/2/adv/",
+        "search_url": "https://lazard-careers.tal.net/vx/lang-en-GB/appcentre-ext/brand-4/candidate/jobboard/vacancy/2/adv/",
+    },
+    {
+        "name": "Deutsche Bank",
+        "scraper_type": "deutsche_recsolu",
+        "base_url": "https://careers.db.com/professionals/search-roles",
+        "search_url": "https://careers.db.com/professionals/search-roles",
+    },
+
     # === Custom HTML / SPA scrapers ===
     # These sites are JS-rendered SPAs - the scraper will attempt HTML parsing
     # but most results will come from the aggregators (LinkedIn, Indeed)
@@ -70,30 +96,6 @@ COMPANIES = [
         "base_url": "https://careers.ca-cib.com/offres-emploi",
         "search_url": "https://careers.ca-cib.com/offres-emploi",
     },
-    {
-        "name": "Goldman Sachs",
-        "scraper_type": "custom_html",
-        "base_url": "https://higher.gs.com/results",
-        "search_url": "https://higher.gs.com/results",
-    },
-    {
-        "name": "JP Morgan",
-        "scraper_type": "custom_html",
-        "base_url": "https://jpmc.fa.oraclecloud.com/hcmUI/CandidateExperience/en/sites/CX_1001/jobs",
-        "search_url": "https://jpmc.fa.oraclecloud.com/hcmUI/CandidateExperience/en/sites/CX_1001/jobs",
-    },
-    {
-        "name": "Lazard",
-        "scraper_type": "custom_html",
-        "base_url": "https://lazard-careers.tal.net/vx/lang-en-GB/appcentre-ext/brand-4/candidate/jobboard/vacancy/2/adv/",
-        "search_url": "https://lazard-careers.tal.net/vx/lang-en-GB/appcentre-ext/brand-4/candidate/jobboard/vacancy/2/adv/",
-    },
-    {
-        "name": "Deutsche Bank",
-        "scraper_type": "custom_html",
-        "base_url": "https://careers.db.com/professionals/search-roles",
-        "search_url": "https://careers.db.com/professionals/search-roles",
-    },
     {
         "name": "Murex",
         "scraper_type": "custom_html",
@@ -1,12 +1,58 @@
 # HTTP client settings
-MIN_DELAY = 1.5  # seconds between requests
+MIN_DELAY = 1.5  # seconds between requests to the same host
 MAX_DELAY = 3.0
+RATE_LIMIT_BURST = 1  # requests a host may receive back to back before delays apply
+# Per-host overrides: add e.g. "rate_limit": {"min_delay": 0.5, "max_delay": 1.0, "burst": 3}
+# to a company in config/companies.py (applies to the host of its base_url)
+# Default "rate_limit" per scraper type, under each company's own entry. Workday tenants
+# serve their JSON API from a CDN and are paged concurrently (WORKDAY_CONCURRENCY)
+SCRAPER_RATE_LIMITS = {
+    "workday": {"min_delay": 0.2, "max_delay": 0.5, "burst": 4},
+}
+MAX_RETRY_AFTER = 120  # longest Retry-After (seconds) honoured on a 429 before giving up
 MAX_RETRIES = 3
 REQUEST_TIMEOUT = 30  # seconds
 
+# Concurrency settings
+SCRAPE_WORKERS = 8  # companies scraped in parallel during Phase 1 (delays stay per host)
+HTTP_BACKEND = "threads"  # "threads" (requests.Session) or "async" (httpx, falls back to threads)
+WORKDAY_CONCURRENCY = 4  # in-flight requests per Workday tenant (company "concurrency" overrides)
+ASYNC_MAX_CONNECTIONS = 200  # pooled keep-alive connections shared by all hosts (async backend)
+
+# HTTP cache settings (ETag/Last-Modified revalidation, see utils/http_cache.py)
+HTTP_CACHE_ENABLED = True
+HTTP_CACHE_PATH = "data/http_cache.sqlite"
+HTTP_CACHE_MAX_BYTES = 200 * 1024 * 1024  # least recently used entries are evicted beyond this
+# Seconds a cached response is reused without contacting the server, per scraper_type.
+# Past the TTL the request is revalidated (304 -> cached body). Override per company with "cache_ttl".
+HTTP_CACHE_TTL = {
+    "default": 0,
+    "custom_html": 6 * 3600,
+    "workday": 3600,
+}
+
 # Scraping settings
 MAX_RESULTS_PER_QUERY = 50  # max results to fetch per keyword query
 MAX_PAGES = 5  # max pagination pages per query
+STOP_ON_KNOWN_PAGE = True  # stop paging a newest-first search at a page whose postings earlier runs all read
+
+# Query planning (utils/query_planner.py): queries are ranked by their past yield
+# (new offers per request) for the company, then for the platform
+QUERY_PLAN_REQUEST_BUDGET = 40  # requests per company before its plan stops
+QUERY_PLAN_PATIENCE = 3  # successive queries without an unseen posting before the plan stops
+QUERY_PLAN_EXPLORE_SHARE = 0.25  # share of each plan kept for queries never run for the company
+
+# Workday: "facets" runs one search narrowed by the tenant's intern + location facets
+# (learned once, cached per tenant) instead of the keyword queries; "keywords" keeps them.
+# A company's "search_mode" overrides it.
+WORKDAY_SEARCH_MODE = "facets"
+WORKDAY_FACETS_PATH = "data/workday_facets.json"
+WORKDAY_FACETS_TTL_DAYS = 7  # facets are re-learned after this many days
+# Patterns of facet values meaning an internship (job type, worker sub-type, job family...)
+WORKDAY_INTERN_FACETS = [
+    r"intern(?:ship)?s?\b", r"stag(?:e|es|iaire|iaires)\b", r"trainee", r"off[- ]?cycle", r"summer",
+    r"placement", r"praktik", r"werkstudent", r"alternan", r"apprenti",
+]
 
 # Aggregator settings
 AGGREGATOR_RESULTS_WANTED = 30  # per keyword per site
@@ -14,7 +60,19 @@ AGGREGATOR_HOURS_OLD = 72  # only jobs posted in last 72 hours
 
 # Output settings
 CSV_DIR = "data"  # New CSV file created each day: data/internships_YYYY-MM-DD.csv
-HASHES_PATH = "data/seen_hashes.json"
+OFFER_STORE_PATH = "data/offers.sqlite"  # every saved offer, indexed; the dated CSVs are exported from it
+HASHES_PATH = "data/seen_hashes.bin"  # sorted uint64 hashes (+ seen_hashes.delta, recent additions)
+DEDUP_DELTA_MAX = 4096  # on startup, compact the delta journal into seen_hashes.bin beyond this many hashes
+DEDUP_SYNC_EVERY = 256  # fsync the delta journal every N newly seen hashes
+DEDUP_TTL_DAYS = 240  # forget hashes first seen longer ago (one recruiting season); None keeps them forever
+DEDUP_BLOOM_ERROR_RATE = 0.01  # false-positive rate of the seen_hashes.bloom pre-check (None to disable)
+
+# Cross-source near-duplicates (same posting from the company site and LinkedIn/Indeed/...)
+NEAR_DUP_ENABLED = True
+NEAR_DUP_INDEX_PATH = "data/near_dup_index.sqlite"  # derived from the CSVs, rebuilt when missing
+NEAR_DUP_THRESHOLD = 0.85  # Jaccard similarity of normalized title shingles
+# Offer sources that relay other sites' postings; a company-site copy is preferred over theirs
+AGGREGATOR_SOURCES = ["linkedin", "indeed", "glassdoor", "welcometothejungle", "aggregator"]
 RUN_LOG_PATH = "data/run_log.json"
 
 # Locations to search (aggregators)
@@ -4,10 +4,15 @@ Finance Internship Scraper - Daily autonomous job scraper
 Scrapes bank career sites and aggregators for trading/sales/structuring internships.
 """
 
+import argparse
+import asyncio
+import csv
 import logging
 import json
 import sys
-from datetime import datetime, timezone
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 
 # Ensure project root is in path
@@ -15,13 +20,25 @@ sys.path.insert(0, str(Path(__file__).parent))
 
 from config.companies import COMPANIES
 from config.keywords import ROLE_KEYWORDS
-from config.settings import MIN_DELAY, MAX_DELAY, MAX_RETRIES, REQUEST_TIMEOUT
+from config.settings import (
+    MIN_DELAY, MAX_DELAY, MAX_RETRIES, REQUEST_TIMEOUT, SCRAPE_WORKERS, SCRAPER_RATE_LIMITS,
+    RATE_LIMIT_BURST, MAX_RETRY_AFTER, HTTP_BACKEND, ASYNC_MAX_CONNECTIONS,
+    HTTP_CACHE_ENABLED, HTTP_CACHE_PATH, HTTP_CACHE_MAX_BYTES, HTTP_CACHE_TTL, CSV_DIR, OFFER_STORE_PATH,
+    HASHES_PATH, DEDUP_DELTA_MAX, DEDUP_BLOOM_ERROR_RATE, DEDUP_SYNC_EVERY, DEDUP_TTL_DAYS,
+    AGGREGATOR_HOURS_OLD, NEAR_DUP_ENABLED, NEAR_DUP_INDEX_PATH, NEAR_DUP_THRESHOLD, AGGREGATOR_SOURCES,
+    QUERY_PLAN_REQUEST_BUDGET, QUERY_PLAN_PATIENCE, QUERY_PLAN_EXPLORE_SHARE,
+)
+from utils.http_cache import HttpCache
 from utils.http_client import HttpClient
+from utils.http_recorder import HttpRecorder
 from utils.dedup import DeduplicationManager
 from utils.csv_manager import CSVManager
 from utils.filters import JobFilter
-from scrapers.workday import WorkdayScraper
-from scrapers.custom_html import CustomHTMLScraper
+from utils.near_dup import NearDuplicateIndex
+from utils.offer_store import OfferStore, SORT_ORDERS
+from utils.posting_log import PostingLog
+from utils.query_planner import QueryPlanner
+from scrapers import load_scraper
 from scrapers.aggregators import AggregatorScraper
 
 logging.basicConfig(
@@ -31,51 +48,355 @@ logging.basicConfig(
 )
 logger = logging.getLogger("main")
 
-SCRAPER_REGISTRY = {
-    "workday": WorkdayScraper,
-    "custom_html": CustomHTMLScraper,
-}
+def configure_rate_limits(companies, http_client):
+    """Apply scraper-type defaults and per-company "rate_limit" overrides to the host of each base_url."""
+    for company_config in companies:
+        limits = {
+            **SCRAPER_RATE_LIMITS.get(company_config["scraper_type"], {}),
+            **company_config.get("rate_limit", {}),
+        }
+        if limits:
+            http_client.rate_limiter.configure(company_config["base_url"], **limits)
+
+
+def scrape_company(company_config, http_client, **options):
+    """Run the scraper for a single company. Exceptions propagate to the caller."""
+    scraper_type = company_config["scraper_type"]
+    company_name = company_config["name"]
+    scraper = load_scraper(scraper_type)(company_config, http_client, **options)
+    logger.info(f"  Scraping {company_name} ({scraper_type})...")
+    offers = scraper.scrape(ROLE_KEYWORDS)
+    logger.info(f"    -> {len(offers)} raw offers from {company_name}")
+    return offers
+
+
+async def scrape_company_async(company_config, http_client, async_client, **options):
+    """Async variant of scrape_company; scrapers without native async run in a thread."""
+    scraper_type = company_config["scraper_type"]
+    company_name = company_config["name"]
+    scraper = load_scraper(scraper_type)(company_config, http_client, async_client=async_client, **options)
+    logger.info(f"  Scraping {company_name} ({scraper_type}, async)...")
+    offers = await scraper.scrape_async(ROLE_KEYWORDS)
+    logger.info(f"    -> {len(offers)} raw offers from {company_name}")
+    return offers
+
+
+def _result_or_exception(future):
+    try:
+        return future.result()
+    except Exception as e:
+        return e
+
+
+def _scrape_threaded(scheduled, http_client, options):
+    with ThreadPoolExecutor(max_workers=SCRAPE_WORKERS, thread_name_prefix="scrape") as pool:
+        futures = [pool.submit(scrape_company, c, http_client, **options) for c in scheduled]
+        return [_result_or_exception(f) for f in futures]
+
+
+async def _scrape_async(scheduled, http_client, async_client_class, options):
+    async with async_client_class(
+        max_retries=http_client.max_retries,
+        timeout=http_client.timeout,
+        max_connections=ASYNC_MAX_CONNECTIONS,
+        max_retry_after=http_client.max_retry_after,
+        rate_limiter=http_client.rate_limiter,
+        cache=http_client.cache,
+        cache_ttl=http_client.cache_ttl,
+        recorder=http_client.recorder,
+    ) as async_client:
+        return await asyncio.gather(
+            *(scrape_company_async(c, http_client, async_client, **options) for c in scheduled),
+            return_exceptions=True,
+        )
+
 
+def scrape_companies(companies, http_client, errors, **options):
+    """
+    Scrape companies concurrently. Politeness delays are enforced per host by
+    the shared rate limiter, so different career sites are fetched at the same
+    time. Results and errors are collected in config order. `options` are
+    passed to every scraper (see BaseScraper): `planner`, the QueryPlanner
+    shared by the run, `postings` (PostingLog) and `data_dir`.
+    """
+    scheduled = []
+    for company_config in companies:
+        scraper_type = company_config["scraper_type"]
+        try:
+            load_scraper(scraper_type)  # imports the platform's module once, before the workers start
+        except KeyError:
+            logger.warning(f"Unknown scraper type '{scraper_type}' for {company_config['name']}, skipping")
+            continue
+        except (ImportError, AttributeError) as e:
+            logger.error(f"    FAILED: {company_config['name']}: cannot load scraper '{scraper_type}': {e}")
+            errors.append({"company": company_config["name"], "scraper": scraper_type, "error": str(e)})
+            continue
+        scheduled.append(company_config)
 
-def main():
+    results = None
+    if HTTP_BACKEND == "async":
+        try:
+            from utils.async_http_client import AsyncHttpClient
+        except ImportError:
+            logger.warning("httpx not installed, falling back to threaded scraping")
+        else:
+            results = asyncio.run(_scrape_async(scheduled, http_client, AsyncHttpClient, options))
+    if results is None:
+        results = _scrape_threaded(scheduled, http_client, options)
+
+    offers = []
+    for company_config, result in zip(scheduled, results):
+        if isinstance(result, BaseException):
+            company_name = company_config["name"]
+            logger.error(f"    FAILED: {company_name}: {result}")
+            errors.append({"company": company_name, "scraper": company_config["scraper_type"], "error": str(result)})
+        else:
+            offers.extend(result)
+    return offers
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Finance Internship Scraper - daily run")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--record", metavar="ARCHIVE",
+                      help="record every HTTP exchange and jobspy call to a .jsonl.gz archive")
+    mode.add_argument("--replay", metavar="ARCHIVE",
+                      help="serve HTTP and jobspy from a recorded archive (no network, no delays)")
+    parser.add_argument("--data-dir", default=CSV_DIR,
+                        help=f"directory for CSVs, seen hashes and run log (default: {CSV_DIR})")
+
+    commands = parser.add_subparsers(dest="command", metavar="COMMAND")
+    rescore = commands.add_parser(
+        "rescore", help="re-apply the current filters and scoring to the stored CSVs"
+    )
+    rescore.add_argument("--data-dir", default=argparse.SUPPRESS)
+    rescore.add_argument("--drop-excluded", action="store_true",
+                         help="remove rows the current filters would reject")
+    rescore.add_argument("--dry-run", action="store_true",
+                         help="report what would change without rewriting any file")
+
+    compact = commands.add_parser(
+        "compact-hashes", help="fold the dedup journal into seen_hashes.bin and evict old hashes"
+    )
+    compact.add_argument("--data-dir", default=argparse.SUPPRESS)
+    compact.add_argument("--ttl-days", type=int, default=DEDUP_TTL_DAYS,
+                         help=f"evict hashes first seen more than N days ago, 0 keeps all (default: {DEDUP_TTL_DAYS})")
+
+    import_csv = commands.add_parser(
+        "import-csv", help=f"(re)import dated CSVs into the offer store ({Path(OFFER_STORE_PATH).name})"
+    )
+    import_csv.add_argument("--data-dir", default=argparse.SUPPRESS)
+    import_csv.add_argument("files", nargs="*", type=Path,
+                            help="CSV files to import (default: every internships*.csv of the data directory)")
+
+    query = commands.add_parser(
+        "query", help="search the stored offers (words, company, location, score, date)"
+    )
+    query.add_argument("--data-dir", default=argparse.SUPPRESS)
+    query.add_argument("words", nargs="*", help="words to find in title, snippet, company or location")
+    query.add_argument("--company", default="", help="words the company name must contain")
+    query.add_argument("--location", default="", help="words the location must contain")
+    query.add_argument("--source", help="only offers from this source (workday, linkedin, ...)")
+    query.add_argument("--since", help="only offers scraped on or after this date (YYYY-MM-DD)")
+    query.add_argument("--min-score", type=float, help="minimum relevance_score")
+    query.add_argument("--region", choices=["prime", "hub"],
+                       help="location bucket of the scoring rules (prime: Paris/London)")
+    query.add_argument("--accepted-only", action="store_true",
+                       help="drop locations the current filters exclude")
+    query.add_argument("--status", choices=["open", "closed"],
+                       help="only offers still listed (open) or gone (closed) at the last run")
+    query.add_argument("--sort", choices=list(SORT_ORDERS),
+                       help="default: match when searching words, else score")
+    query.add_argument("--limit", type=int, default=20)
+    query.add_argument("--csv", action="store_true", help="print matching rows as CSV")
+    return parser.parse_args(argv)
+
+
+def open_store(data_dir):
+    """Open the offer store and catch up with CSVs written or edited outside it."""
+    store = OfferStore(data_dir / Path(OFFER_STORE_PATH).name)
+    summary = store.sync(data_dir)
+    if summary["imported"]:
+        logger.info(f"Imported {summary['rows']} offers from {summary['imported']} CSV file(s) into the offer store")
+    if summary["exported"]:
+        logger.warning(f"Exported {summary['exported']} CSV file(s) an interrupted run left unwritten")
+    return store
+
+
+def open_dedup(data_dir, csv_mgr):
+    return DeduplicationManager(
+        data_dir / Path(HASHES_PATH).name,
+        delta_max=DEDUP_DELTA_MAX,
+        bloom_error_rate=DEDUP_BLOOM_ERROR_RATE,
+        sync_every=DEDUP_SYNC_EVERY,
+        ttl_days=DEDUP_TTL_DAYS,
+        history=csv_mgr.stored_offers,
+    )
+
+
+def open_near_dups(data_dir, csv_mgr, dedup):
+    index = NearDuplicateIndex(
+        data_dir / Path(NEAR_DUP_INDEX_PATH).name,
+        threshold=NEAR_DUP_THRESHOLD,
+        aggregator_sources=AGGREGATOR_SOURCES,
+        ttl_days=DEDUP_TTL_DAYS,
+    )
+    if not len(index):
+        logger.info("Building the near-duplicate index from stored CSVs...")
+        index.rebuild(
+            (dedup.compute_hash(row["url"], row["title"]), row["company"], row["title"],
+             row["location"], row["url"], row["source"], day)
+            for row, day in csv_mgr.stored_rows()
+        )
+    return index
+
+
+def diff_offers(store, dedup, filtered_offers, company_offers, errors, planner, now=None):
+    """
+    Compare today's filtered offers with the offers open after the previous
+    run. `company_offers` are the raw offers of the company scrapers (Phase 1).
+    """
+    now = now or datetime.now(timezone.utc)
+    live = {
+        dedup.compute_hash(o.url, o.title): (o.company, o.source, o.title, o.url, o.search_query or "")
+        for o in filtered_offers
+    }
+    # Aggregator offers may carry a company name: they don't make its own scrape a success
+    scraped_companies = {o.company for o in company_offers}
+    failed_companies = {e["company"] for e in errors}
+    aggregators = set(AGGREGATOR_SOURCES)
+    # Aggregator searches only list postings of the last AGGREGATOR_HOURS_OLD hours
+    aggregator_window = (now - timedelta(hours=AGGREGATOR_HOURS_OLD)).isoformat()
+
+    def keep_open(company, source, search_query, last_seen):
+        if source in aggregators:
+            return "aggregators" in failed_companies or last_seen >= aggregator_window
+        # A failed or empty scrape proves nothing, and neither does a search the plan skipped or did not read
+        return (
+            company in failed_companies or company not in scraped_companies
+            or not planner.fully_searched(company, search_query)
+        )
+
+    return store.update_liveness(live, now.isoformat(), keep_open, ttl_days=DEDUP_TTL_DAYS)
+
+
+def compact_hashes(data_dir, ttl_days):
+    dedup = open_dedup(data_dir, CSVManager(data_dir))
+    before = len(dedup)
+    evicted = dedup.compact(ttl_days=ttl_days)
+    dedup.save()
+    dedup.close()
+    logger.info(f"Compacted {before} seen hashes: {evicted} evicted, {before - evicted} kept")
+    return 0
+
+
+def import_csvs(data_dir, files):
+    store = OfferStore(data_dir / Path(OFFER_STORE_PATH).name)
+    files = files or sorted(data_dir.glob("internships*.csv"))
+    rows = sum(store.import_csv(path) for path in files)
+    logger.info(f"Imported {rows} offers from {len(files)} CSV file(s); the store holds {len(store)} offers")
+    store.close()
+    return 0
+
+
+def query_offers(data_dir, args):
+    store = open_store(data_dir)
+    start = time.perf_counter()
+    results = store.search(
+        " ".join(args.words), company=args.company, location=args.location, source=args.source,
+        since=args.since, min_score=args.min_score, region=args.region,
+        accepted_only=args.accepted_only, status=args.status, sort=args.sort, limit=args.limit,
+    )
+    elapsed = time.perf_counter() - start
+    store.close()
+    if args.csv:
+        writer = csv.DictWriter(sys.stdout, fieldnames=CSVManager.COLUMNS, lineterminator="\n")
+        writer.writeheader()
+        writer.writerows(row for row, _ in results)
+    else:
+        for row, _ in results:
+            print(f"{row['date_scraped'][:10]}  {row['relevance_score']:>4}  {row['company'][:24]:<24}  "
+                  f"{row['title'][:60]:<60}  {row['location'][:28]:<28}  {row['url']}")
+    logger.info(f"{len(results)} offer(s) in {elapsed * 1e3:.1f}ms")
+    return 0
+
+
+def rescore(data_dir, drop_excluded=False, dry_run=False):
+    from utils.batch_filter import rescore_files
+
+    summary = rescore_files(data_dir, drop_excluded=drop_excluded, dry_run=dry_run)
+    logger.info(
+        f"Rescored {summary['rows']} offers in {summary['files']} file(s): "
+        f"{summary['rescored']} new scores, {summary['now_excluded']} now excluded"
+        + (" (dry run, nothing written)" if dry_run else "")
+    )
+    return 0
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    data_dir = Path(args.data_dir)
+    if args.command == "rescore":
+        return rescore(data_dir, drop_excluded=args.drop_excluded, dry_run=args.dry_run)
+    if args.command == "compact-hashes":
+        return compact_hashes(data_dir, args.ttl_days)
+    if args.command == "import-csv":
+        return import_csvs(data_dir, args.files)
+    if args.command == "query":
+        return query_offers(data_dir, args)
+
+    run_started = datetime.now(timezone.utc).isoformat()
     logger.info("=" * 60)
     logger.info("Finance Internship Scraper - Starting daily run")
     logger.info("=" * 60)
 
     # Initialize components
+    recorder = None
+    if args.record:
+        recorder = HttpRecorder(args.record, "record")
+        logger.info(f"Recording HTTP traffic to {args.record}")
+    elif args.replay:
+        recorder = HttpRecorder(args.replay, "replay")
+        logger.info(f"Replaying HTTP traffic from {args.replay}")
+
+    use_cache = HTTP_CACHE_ENABLED and not args.replay
+    http_cache = HttpCache(data_dir / Path(HTTP_CACHE_PATH).name, max_bytes=HTTP_CACHE_MAX_BYTES) if use_cache else None
     http_client = HttpClient(
         min_delay=MIN_DELAY,
         max_delay=MAX_DELAY,
         max_retries=MAX_RETRIES,
         timeout=REQUEST_TIMEOUT,
+        pool_size=max(10, SCRAPE_WORKERS * 2),
+        burst=RATE_LIMIT_BURST,
+        max_retry_after=MAX_RETRY_AFTER,
+        cache=http_cache,
+        cache_ttl=HTTP_CACHE_TTL["default"],
+        recorder=recorder,
     )
-    dedup = DeduplicationManager()
-    csv_mgr = CSVManager()
+    configure_rate_limits(COMPANIES, http_client)
+    csv_mgr = CSVManager(data_dir, store=open_store(data_dir))
+    dedup = open_dedup(data_dir, csv_mgr)
+    recovered = csv_mgr.reconcile(dedup)
+    if recovered:
+        logger.warning(f"Recovered {recovered} seen hashes missing from the dedup journal (interrupted run)")
     job_filter = JobFilter()
+    planner = QueryPlanner(
+        csv_mgr.store.query_stats(),
+        request_budget=QUERY_PLAN_REQUEST_BUDGET,
+        patience=QUERY_PLAN_PATIENCE,
+        explore_share=QUERY_PLAN_EXPLORE_SHARE,
+    )
 
     all_offers = []
     errors = []
 
     # Phase 1: Scrape individual company career sites
-    logger.info(f"Phase 1: Scraping {len(COMPANIES)} company career sites...")
-    for company_config in COMPANIES:
-        scraper_type = company_config["scraper_type"]
-        company_name = company_config["name"]
-
-        if scraper_type not in SCRAPER_REGISTRY:
-            logger.warning(f"Unknown scraper type '{scraper_type}' for {company_name}, skipping")
-            continue
-
-        try:
-            scraper_class = SCRAPER_REGISTRY[scraper_type]
-            scraper = scraper_class(company_config, http_client)
-            logger.info(f"  Scraping {company_name} ({scraper_type})...")
-            offers = scraper.scrape(ROLE_KEYWORDS)
-            logger.info(f"    -> {len(offers)} raw offers from {company_name}")
-            all_offers.extend(offers)
-        except Exception as e:
-            logger.error(f"    FAILED: {company_name}: {e}")
-            errors.append({"company": company_name, "scraper": scraper_type, "error": str(e)})
+    logger.info(f"Phase 1: Scraping {len(COMPANIES)} company career sites ({HTTP_BACKEND} backend)...")
+    postings = PostingLog(csv_mgr.store.read_postings())
+    company_offers = scrape_companies(
+        COMPANIES, http_client, errors, planner=planner, postings=postings, data_dir=data_dir
+    )
+    all_offers.extend(company_offers)
 
     # Phase 2: Scrape aggregator sites
     logger.info("Phase 2: Scraping aggregator sites (LinkedIn, Indeed, Glassdoor, WTTJ)...")
@@ -88,15 +409,35 @@ def main():
         logger.error(f"    FAILED: aggregators: {e}")
         errors.append({"company": "aggregators", "scraper": "aggregators", "error": str(e)})
 
+    if http_cache is not None:
+        http_cache.close()
+    if recorder is not None:
+        recorder.close()
+
     # Phase 3: Filter and score
     logger.info(f"Phase 3: Filtering {len(all_offers)} raw offers...")
     filtered_offers = job_filter.filter_and_score(all_offers)
     logger.info(f"    -> {len(filtered_offers)} relevant offers after filtering")
 
+    # Diff against the offers still open after the previous run
+    run_diff = diff_offers(csv_mgr.store, dedup, filtered_offers, company_offers, errors, planner)
+    logger.info(
+        f"    -> since the last run: {len(run_diff.appeared)} appeared, "
+        f"{len(run_diff.still_open)} still open, {len(run_diff.closed)} closed"
+    )
+
     # Phase 4: Deduplicate and save to today's CSV
     logger.info(f"Phase 4: Deduplicating and saving to {csv_mgr.csv_path.name}...")
-    added_count = csv_mgr.save_offers(filtered_offers, dedup)
+    near_dups = open_near_dups(data_dir, csv_mgr, dedup) if NEAR_DUP_ENABLED else None
+    added_count = csv_mgr.save_offers(filtered_offers, dedup, near_dups)
+    # Only once their offers are saved and marked seen: a posting recorded as read stops the next run's paging
+    csv_mgr.store.record_postings(postings.read(), run_started, ttl_days=DEDUP_TTL_DAYS)
+    csv_mgr.store.record_query_stats(planner.executed(), run_started, AGGREGATOR_SOURCES)
     dedup.save()
+    dedup.close()
+    if near_dups is not None:
+        near_dups.close()
+    csv_mgr.store.close()
     logger.info(f"    -> {added_count} NEW offers saved to {csv_mgr.csv_path.name}")
 
     # Phase 5: Write run log
@@ -105,12 +446,18 @@ def main():
         "total_raw_offers": len(all_offers),
         "total_after_filter": len(filtered_offers),
         "new_offers_added": added_count,
+        "offers_appeared": len(run_diff.appeared),
+        "offers_still_open": len(run_diff.still_open),
+        "offers_closed": [
+            {"id": offer_id, "company": company, "title": title, "url": url}
+            for offer_id, company, title, url in run_diff.closed
+        ],
         "companies_scraped": len(COMPANIES),
         "errors_count": len(errors),
         "errors": errors,
     }
 
-    log_path = Path("data/run_log.json")
+    log_path = data_dir / "run_log.json"
     log_path.parent.mkdir(parents=True, exist_ok=True)
     log_path.write_text(json.dumps(run_log, indent=2, ensure_ascii=False))
 
@@ -0,0 +1,60 @@
+"""
+Scraper registry: scraper_type -> "module:Class".
+
+Scraper modules are imported the first time a company of their type is
+scheduled, so a run only pays for the platforms (and the bs4/lxml imports)
+it actually uses. Other packages can add scraper types through the
+"finance_internship_scraper.scrapers" entry-point group, named after the
+scraper_type; built-in types take precedence.
+"""
+
+import importlib
+import logging
+import threading
+from importlib.metadata import entry_points
+
+logger = logging.getLogger(__name__)
+
+ENTRY_POINT_GROUP = "finance_internship_scraper.scrapers"
+
+# Types used by config/companies.py; smartrecruiters.py and taleo.py are registered once a company needs them
+BUILTIN_SCRAPERS = {
+    "workday": "scrapers.workday:WorkdayScraper",
+    "custom_html": "scrapers.custom_html:CustomHTMLScraper",
+    "oracle_hcm": "scrapers.oracle_hcm:OracleHCMScraper",
+    "goldman_avature": "scrapers.goldman_avature:GoldmanAvatureScraper",
+    "talentlink": "scrapers.talentlink:TalentLinkScraper",
+    "deutsche_recsolu": "scrapers.deutsche_recsolu:DeutscheRecsoluScraper",
+}
+
+_registry = None
+_loaded = {}  # scraper_type -> class
+_lock = threading.Lock()
+
+
+def _paths() -> dict:
+    global _registry
+    if _registry is None:
+        plugins = {ep.name: ep.value for ep in entry_points(group=ENTRY_POINT_GROUP)}
+        _registry = {**plugins, **BUILTIN_SCRAPERS}
+    return _registry
+
+
+def scraper_types() -> list:
+    """Every registered scraper_type, nothing imported."""
+    with _lock:
+        return sorted(_paths())
+
+
+def load_scraper(scraper_type: str):
+    """
+    Scraper class of `scraper_type`, importing its module on first use.
+    Raises KeyError for an unknown type and ImportError when the module
+    or one of its dependencies is missing.
+    """
+    with _lock:
+        if scraper_type not in _loaded:
+            module_name, _, class_name = _paths()[scraper_type].partition(":")
+            _loaded[scraper_type] = getattr(importlib.import_module(module_name), class_name)
+            logger.debug(f"Loaded scraper '{scraper_type}' from {module_name}")
+        return _loaded[scraper_type]
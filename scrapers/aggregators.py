@@ -27,12 +27,29 @@ class AggregatorScraper:
 
         return offers
 
+    def _call_jobspy(self, scrape_jobs, params: dict):
+        """Call jobspy, going through the HTTP recorder in record/replay mode."""
+        recorder = getattr(self.client, "recorder", None)
+        if recorder is not None and recorder.replaying:
+            import pandas as pd
+            return pd.DataFrame(recorder.replay_call("jobspy", params))
+
+        jobs_df = scrape_jobs(**params)
+        if recorder is not None and recorder.recording:
+            # Stored as strings: the parser below only ever reads str(value)
+            rows = [] if jobs_df is None else jobs_df.astype(str).to_dict("records")
+            recorder.record_call("jobspy", params, rows)
+        return jobs_df
+
     def _scrape_jobspy(self, keywords: List[str]) -> List[JobOffer]:
+        recorder = getattr(self.client, "recorder", None)
         try:
             from jobspy import scrape_jobs
         except ImportError:
-            logger.warning("python-jobspy not installed, skipping aggregator scraping")
-            return []
+            if recorder is None or not recorder.replaying:
+                logger.warning("python-jobspy not installed, skipping aggregator scraping")
+                return []
+            scrape_jobs = None
 
         offers = []
         seen_urls = set()
@@ -63,14 +80,14 @@ class AggregatorScraper:
             for location, indeed_country in search_locations:
                 try:
                     logger.info(f"[Aggregators] Searching '{search_term}' in {location}...")
-                    jobs_df = scrape_jobs(
-                        site_name=["indeed", "linkedin", "glassdoor"],
-                        search_term=search_term,
-                        location=location,
-                        results_wanted=AGGREGATOR_RESULTS_WANTED,
-                        hours_old=AGGREGATOR_HOURS_OLD,
-                        country_indeed=indeed_country,
-                    )
+                    jobs_df = self._call_jobspy(scrape_jobs, {
+                        "site_name": ["indeed", "linkedin", "glassdoor"],
+                        "search_term": search_term,
+                        "location": location,
+                        "results_wanted": AGGREGATOR_RESULTS_WANTED,
+                        "hours_old": AGGREGATOR_HOURS_OLD,
+                        "country_indeed": indeed_country,
+                    })
 
                     if jobs_df is None or jobs_df.empty:
                         continue
@@ -89,6 +106,7 @@ class AggregatorScraper:
                             date_posted=str(row.get("date_posted", "")),
                             description_snippet=str(row.get("description", ""))[:300],
                             source=str(row.get("site", "aggregator")),
+                            search_query=search_term,
                             job_type="internship",
                             duration=None,
                             department=None,
@@ -153,6 +171,7 @@ class AggregatorScraper:
                         date_posted="",
                         description_snippet="",
                         source="welcometothejungle",
+                        search_query=query,
                         job_type="stage",
                         duration=None,
                         department=None,
@@ -1,7 +1,12 @@
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
 from typing import List, Optional
+import asyncio
 import logging
+import threading
+from pathlib import Path
+from config.settings import HTTP_CACHE_TTL, STOP_ON_KNOWN_PAGE
+from utils.query_planner import QueryPlanner
 
 logger = logging.getLogger(__name__)
 
@@ -19,40 +24,122 @@ class JobOffer:
     duration: Optional[str] = None
     department: Optional[str] = None
     relevance_score: float = 0.0
+    search_query: Optional[str] = None  # query that found the offer, None for listing pages
 
 
 class BaseScraper(ABC):
-    def __init__(self, company_config: dict, http_client):
+    def __init__(self, company_config: dict, http_client, async_client=None, planner=None, postings=None,
+                 data_dir="data"):
         self.company_name = company_config["name"]
         self.config = company_config
         self.client = http_client
+        self.async_client = async_client
+        self.planner = planner or QueryPlanner()
+        self.postings = postings  # PostingLog of the run (utils/posting_log.py)
+        self.data_dir = Path(data_dir)  # the run's --data-dir, for state a scraper keeps between runs
+        self.requests_made = 0
+        self.requests_failed = 0
+        self._requests_lock = threading.Lock()
+        self.cache_ttl = company_config.get(
+            "cache_ttl",
+            HTTP_CACHE_TTL.get(company_config.get("scraper_type"), HTTP_CACHE_TTL["default"]),
+        )
 
     @abstractmethod
     def scrape(self, keywords: List[str]) -> List[JobOffer]:
         pass
 
+    async def scrape_async(self, keywords: List[str]) -> List[JobOffer]:
+        """Async entry point. Scrapers without a native version run scrape() in a worker thread."""
+        return await asyncio.to_thread(self.scrape, keywords)
+
     def _build_search_queries(self, keywords: List[str]) -> List[str]:
+        """
+        Every prefix x keyword query, in cold-start order: each round pairs
+        every keyword with a prefix, rotating prefixes between keywords and
+        rounds, so any leading slice mixes prefixes.
+        """
         prefixes = ["stage", "internship", "stagiaire", "intern"]
         queries = []
-        for prefix in prefixes:
-            for kw in keywords:
-                queries.append(f"{prefix} {kw}")
+        for round_ in range(len(prefixes)):
+            for i, kw in enumerate(keywords):
+                queries.append(f"{prefixes[(i + round_) % len(prefixes)]} {kw}")
         return queries
 
+    def _plan_queries(self, keywords: List[str], max_queries: int):
+        """QueryPlan of the best queries for this company (see utils/query_planner.py)."""
+        return self.planner.plan(
+            self.company_name,
+            self.config.get("scraper_type", ""),
+            self._build_search_queries(keywords),
+            max_queries,
+            request_count=lambda: self.requests_made,
+            failure_count=lambda: self.requests_failed,
+        )
+
+    def _page_known(self, keys) -> bool:
+        """
+        Record the raw posting ids of a result page, and tell whether earlier
+        runs had read them all. On a search sorted newest first, the pages
+        after it hold older postings that earlier runs read too, so paging
+        can stop there.
+        """
+        if self.postings is None:
+            return False
+        return self.postings.read_page(self.company_name, keys) and STOP_ON_KNOWN_PAGE
+
+    def _count_request(self):
+        with self._requests_lock:
+            self.requests_made += 1
+
+    def _count_failure(self, method, url, error):
+        logger.warning(f"[{self.company_name}] {method} {url} failed: {error}")
+        with self._requests_lock:
+            self.requests_failed += 1
+        # Searches outside a query plan (listing pages, Workday facets) may have missed offers:
+        # they must not be closed by this run's diff (planned queries are tracked by their QueryPlan)
+        self.planner.mark_incomplete(self.company_name)
+
     def _safe_get(self, url: str, **kwargs):
         try:
-            resp = self.client.get(url, **kwargs)
+            self._count_request()
+            resp = self.client.get(url, cache_ttl=self.cache_ttl, **kwargs)
             resp.raise_for_status()
             return resp
         except Exception as e:
-            logger.warning(f"[{self.company_name}] GET {url} failed: {e}")
+            self._count_failure("GET", url, e)
             return None
 
     def _safe_post(self, url: str, **kwargs):
         try:
-            resp = self.client.post(url, **kwargs)
+            self._count_request()
+            resp = self.client.post(url, cache_ttl=self.cache_ttl, **kwargs)
+            resp.raise_for_status()
+            return resp
+        except Exception as e:
+            self._count_failure("POST", url, e)
+            return None
+
+    async def _safe_get_async(self, url: str, **kwargs):
+        if self.async_client is None:
+            return await asyncio.to_thread(self._safe_get, url, **kwargs)
+        try:
+            self._count_request()
+            resp = await self.async_client.get(url, cache_ttl=self.cache_ttl, **kwargs)
+            resp.raise_for_status()
+            return resp
+        except Exception as e:
+            self._count_failure("GET", url, e)
+            return None
+
+    async def _safe_post_async(self, url: str, **kwargs):
+        if self.async_client is None:
+            return await asyncio.to_thread(self._safe_post, url, **kwargs)
+        try:
+            self._count_request()
+            resp = await self.async_client.post(url, cache_ttl=self.cache_ttl, **kwargs)
             resp.raise_for_status()
             return resp
         except Exception as e:
-            logger.warning(f"[{self.company_name}] POST {url} failed: {e}")
+            self._count_failure("POST", url, e)
             return None
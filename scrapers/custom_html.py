@@ -1,3 +1,4 @@
+import asyncio
 import logging
 from typing import List
 from urllib.parse import urlparse, urljoin
@@ -28,6 +29,20 @@ class CustomHTMLScraper(BaseScraper):
         logger.info(f"[CustomHTML/{self.company_name}] Total unique offers: {len(offers)}")
         return offers
 
+    async def scrape_async(self, keywords: List[str]) -> List[JobOffer]:
+        seen_urls = set()
+        base_url = self.config["base_url"]
+
+        resp = await self._safe_get_async(base_url)
+        if not resp:
+            offers = []
+        else:
+            # Parse off the event loop so other companies' requests keep flowing
+            offers = await asyncio.to_thread(self._parse_job_listings, resp.text, base_url, seen_urls)
+
+        logger.info(f"[CustomHTML/{self.company_name}] Total unique offers: {len(offers)}")
+        return offers
+
     def _scrape_listing_page(self, url: str, seen_urls: set) -> List[JobOffer]:
         """Fetch and parse a careers listing page directly."""
         resp = self._safe_get(url)
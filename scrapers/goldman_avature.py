@@ -16,11 +16,10 @@ class GoldmanAvatureScraper(BaseScraper):
         seen_ids = set()
         base_url = self.config["base_url"]
 
-        queries = self._build_search_queries(keywords)
-        queries = queries[:10]
-
-        for query in queries:
+        plan = self._plan_queries(keywords, max_queries=10)
+        for query in plan:
             page_offers = self._search(base_url, query, seen_ids)
+            plan.record(query, unseen=len(page_offers))
             offers.extend(page_offers)
 
         logger.info(f"[Goldman/{self.company_name}] Total unique offers: {len(offers)}")
@@ -62,6 +61,7 @@ class GoldmanAvatureScraper(BaseScraper):
                             date_posted=role.get("postedDate", ""),
                             description_snippet=str(role.get("description", ""))[:300],
                             source="goldman_avature",
+                            search_query=query,
                             job_type=role.get("type", ""),
                             duration=None,
                             department=role.get("division", role.get("department", "")),
@@ -110,6 +110,7 @@ class GoldmanAvatureScraper(BaseScraper):
                     location="",
                     url=job_url,
                     source="goldman_avature",
+                    search_query=query,
                 )
                 offers.append(offer)
 
@@ -17,11 +17,10 @@ class OracleHCMScraper(BaseScraper):
         seen_ids = set()
         base_url = self.config["base_url"]
 
-        queries = self._build_search_queries(keywords)
-        queries = queries[:10]
-
-        for query in queries:
+        plan = self._plan_queries(keywords, max_queries=10)
+        for query in plan:
             page_offers = self._search(base_url, query, seen_ids)
+            plan.record(query, unseen=len(page_offers))
             offers.extend(page_offers)
 
         logger.info(f"[OracleHCM/{self.company_name}] Total unique offers: {len(offers)}")
@@ -68,7 +67,7 @@ class OracleHCMScraper(BaseScraper):
             data = resp.json()
         except Exception:
             # If JSON fails, try HTML parsing as fallback
-            return self._parse_html_fallback(resp.text, base_url, seen_ids)
+            return self._parse_html_fallback(resp.text, base_url, query, seen_ids)
 
         # Parse Oracle HCM JSON response
         items = data.get("items", data.get("requisitionList", []))
@@ -96,6 +95,7 @@ class OracleHCMScraper(BaseScraper):
                 date_posted=item.get("PostedDate", item.get("postedDate", "")),
                 description_snippet=str(item.get("ShortDescriptionStr", item.get("description", "")))[:300],
                 source="oracle_hcm",
+                search_query=query,
                 job_type=item.get("JobType", item.get("jobType", "")),
                 duration=None,
                 department=item.get("Organization", item.get("department", "")),
@@ -104,7 +104,7 @@ class OracleHCMScraper(BaseScraper):
 
         return offers
 
-    def _parse_html_fallback(self, html: str, base_url: str, seen_ids: set) -> List[JobOffer]:
+    def _parse_html_fallback(self, html: str, base_url: str, query: str, seen_ids: set) -> List[JobOffer]:
         """Fallback HTML parsing if API returns HTML instead of JSON."""
         from bs4 import BeautifulSoup
         offers = []
@@ -132,6 +132,7 @@ class OracleHCMScraper(BaseScraper):
                 location="",
                 url=job_url,
                 source="oracle_hcm",
+                search_query=query,
             )
             offers.append(offer)
 
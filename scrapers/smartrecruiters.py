@@ -20,18 +20,23 @@ class SmartRecruitersScraper(BaseScraper):
         offers = []
         seen_ids = set()
 
-        queries = self._build_search_queries(keywords)
-        # Limit to a representative subset to avoid excessive API calls
-        queries = queries[:15]
-
-        for query in queries:
-            page_offers = self._search(identifier, query, extra_params, seen_ids)
+        # Best queries by past yield, within a request budget (avoids excessive API calls)
+        plan = self._plan_queries(keywords, max_queries=15)
+        for query in plan:
+            page_offers, complete = self._search(identifier, query, extra_params, seen_ids)
+            plan.record(query, unseen=len(page_offers), complete=complete)
             offers.extend(page_offers)
 
         logger.info(f"[SmartRecruiters/{self.company_name}] Total unique offers: {len(offers)}")
         return offers
 
-    def _search(self, identifier: str, query: str, extra_params: dict, seen_ids: set) -> List[JobOffer]:
+    def _search(self, identifier: str, query: str, extra_params: dict, seen_ids: set):
+        """
+        Offers of one query, and whether its results were read to the end
+        (QueryPlan.record also catches failed requests). Postings come
+        newest first, so paging stops after a page that earlier runs had
+        entirely read; the query still counts as read to the end.
+        """
         offers = []
         offset = 0
         limit = 100
@@ -53,12 +58,13 @@ class SmartRecruitersScraper(BaseScraper):
                 data = resp.json()
             except Exception:
                 logger.warning(f"[SmartRecruiters/{self.company_name}] Invalid JSON for query '{query}'")
-                break
+                return offers, False
 
             content = data.get("content", [])
             if not content:
                 break
 
+            page_known = self._page_known(posting.get("id", "") for posting in content)
             for posting in content:
                 posting_id = posting.get("id", "")
                 if posting_id in seen_ids:
@@ -104,6 +110,7 @@ class SmartRecruitersScraper(BaseScraper):
                     date_posted=posting.get("releasedDate", ""),
                     description_snippet=posting.get("customField", [{}])[0].get("valueLabel", "") if posting.get("customField") else "",
                     source="smartrecruiters",
+                    search_query=query,
                     job_type=job_type or exp_label,
                     duration=None,
                     department=department,
@@ -114,5 +121,8 @@ class SmartRecruitersScraper(BaseScraper):
             offset += limit
             if offset >= total_found or offset >= 300:
                 break
+            if page_known:
+                logger.info(f"[SmartRecruiters/{self.company_name}] '{query}': page already read, stopping at {offset}")
+                break
 
-        return offers
+        return offers, True
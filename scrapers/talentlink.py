@@ -17,11 +17,10 @@ class TalentLinkScraper(BaseScraper):
         seen_urls = set()
         base_url = self.config["base_url"]
 
-        queries = self._build_search_queries(keywords)
-        queries = queries[:10]
-
-        for query in queries:
+        plan = self._plan_queries(keywords, max_queries=10)
+        for query in plan:
             page_offers = self._search(base_url, query, seen_urls)
+            plan.record(query, unseen=len(page_offers))
             offers.extend(page_offers)
 
         logger.info(f"[TalentLink/{self.company_name}] Total unique offers: {len(offers)}")
@@ -91,6 +90,7 @@ class TalentLinkScraper(BaseScraper):
                     date_posted="",
                     description_snippet="",
                     source="talentlink",
+                    search_query=query,
                     job_type="",
                     duration=None,
                     department=None,
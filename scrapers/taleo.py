@@ -18,11 +18,10 @@ class TaleoScraper(BaseScraper):
         seen_urls = set()
         base_url = self.config["base_url"]
 
-        queries = self._build_search_queries(keywords)
-        queries = queries[:10]
-
-        for query in queries:
+        plan = self._plan_queries(keywords, max_queries=10)
+        for query in plan:
             page_offers = self._search(base_url, query, seen_urls)
+            plan.record(query, unseen=len(page_offers))
             offers.extend(page_offers)
 
         logger.info(f"[Taleo/{self.company_name}] Total unique offers: {len(offers)}")
@@ -100,6 +99,7 @@ class TaleoScraper(BaseScraper):
                     date_posted=date_posted,
                     description_snippet="",
                     source="taleo",
+                    search_query=query,
                     job_type="",
                     duration=None,
                     department=None,
@@ -1,108 +1,369 @@
+import asyncio
+import json
 import logging
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
 from typing import List
+from urllib.parse import urlparse
 from scrapers.base import BaseScraper, JobOffer
+from config.settings import (
+    WORKDAY_CONCURRENCY, WORKDAY_SEARCH_MODE, WORKDAY_FACETS_PATH, WORKDAY_FACETS_TTL_DAYS,
+    WORKDAY_INTERN_FACETS, LOCATIONS,
+)
 
 logger = logging.getLogger(__name__)
 
+PAGE_SIZE = 20
+MAX_OFFSET = 200  # deepest page fetched for a keyword search
+FACETS_MAX_OFFSET = 1000  # a facet-narrowed search is paged further: it is the whole result set
+MAX_QUERIES = 12
+HEADERS = {"Content-Type": "application/json", "Accept": "application/json"}
+
+ALL_JOBS = ("", {})  # unfiltered search: its response lists the tenant's facets
+INTERN_RE = re.compile(r"\b(?:" + "|".join(WORKDAY_INTERN_FACETS) + r")", re.IGNORECASE)
+LOCATION_RE = re.compile(r"\b(?:" + "|".join(map(re.escape, LOCATIONS)) + r")\b", re.IGNORECASE)
+
+
+class FacetCache:
+    """
+    Facets applied per Workday tenant (keyed by API URL), in a JSON file
+    shared by every scraper of the run. An empty entry records a tenant
+    without a usable intern facet, so its metadata is not fetched again
+    before the entry expires.
+    """
+
+    def __init__(self, path, ttl_days=7):
+        self.path = Path(path)
+        self.ttl = timedelta(days=ttl_days)
+        self._lock = threading.Lock()
+        self._entries = None
+
+    def _load(self):
+        if self._entries is None:
+            try:
+                self._entries = json.loads(self.path.read_text())
+            except (OSError, json.JSONDecodeError):
+                self._entries = {}
+        return self._entries
+
+    def get(self, key):
+        """Applied facets of a tenant ({} for none), or None if unknown or expired."""
+        with self._lock:
+            entry = self._load().get(key)
+        if not entry:
+            return None
+        fetched_at = datetime.fromisoformat(entry["fetched_at"])
+        if datetime.now(timezone.utc) - fetched_at > self.ttl:
+            return None
+        return entry["applied"]
+
+    def put(self, key, applied, labels=()):
+        with self._lock:
+            entries = self._load()
+            entries[key] = {
+                "applied": applied,
+                "labels": sorted(labels),
+                "fetched_at": datetime.now(timezone.utc).isoformat(),
+            }
+            self._write(entries)
+
+    def forget(self, key):
+        with self._lock:
+            if self._load().pop(key, None) is not None:
+                self._write(self._entries)
+
+    def _write(self, entries):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(entries, indent=2, sort_keys=True, ensure_ascii=False))
+        os.replace(tmp, self.path)
+
+
+_facet_caches = {}  # path -> FacetCache shared by the scrapers of a run
+_facet_caches_lock = threading.Lock()
+
+
+def facet_cache(data_dir) -> FacetCache:
+    """The FacetCache of a data directory (WORKDAY_FACETS_PATH's file name in it)."""
+    path = Path(data_dir) / Path(WORKDAY_FACETS_PATH).name
+    with _facet_caches_lock:
+        if path not in _facet_caches:
+            _facet_caches[path] = FacetCache(path, WORKDAY_FACETS_TTL_DAYS)
+        return _facet_caches[path]
+
+
+def _facet_values(facets):
+    """Yield (facetParameter, value) for every facet value, nested groups included."""
+    for facet in facets or ():
+        for value in facet.get("values", ()):
+            if "values" in value:
+                yield from _facet_values([value])
+            elif "id" in value:
+                yield facet.get("facetParameter"), value
+
+
+def _best_facet(facets, pattern, exclude=None):
+    """
+    (parameter, values) of the facet whose values matching `pattern` cover
+    the most postings, or None. A single facet per criterion: values of one
+    facet are OR'ed, different facets AND'ed.
+    """
+    matches = {}
+    for parameter, value in _facet_values(facets):
+        if parameter and parameter != exclude and pattern.search(value.get("descriptor", "")):
+            matches.setdefault(parameter, []).append(value)
+    if not matches:
+        return None
+    return max(matches.items(), key=lambda item: sum(v.get("count", 0) for v in item[1]))
+
 
 class WorkdayScraper(BaseScraper):
     """
     Scraper for Workday-powered career sites.
     Uses the internal /wday/cxs/ JSON API (same API the JS frontend calls).
     Companies: Barclays, Morgan Stanley, Citi, Fidelity, HSBC, UBS.
+
+    In "facets" mode (WORKDAY_SEARCH_MODE, or the company's "search_mode"),
+    one search narrowed by the tenant's intern and location facets replaces
+    the keyword queries; the facet ids are learned from an unfiltered search
+    and cached per tenant (FacetCache, in the run's data_dir). Tenants
+    without an intern facet use the keyword queries. Without search text Workday lists postings newest
+    first, so the facet search is paged `concurrency` pages at a time and
+    stops after a page earlier runs had entirely read (PostingLog).
+
+    Keyword queries come from the company's QueryPlan, `concurrency`
+    (default WORKDAY_CONCURRENCY) at a time: the first page of each is
+    fetched concurrently, then all the remaining pages their `total` calls
+    for, with at most `concurrency` requests in flight per tenant; the host
+    rate limiter still spaces them. Postings are merged and deduplicated
+    in plan, search and page order, so results are deterministic.
     """
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.facet_cache = facet_cache(self.data_dir)
+
     def scrape(self, keywords: List[str]) -> List[JobOffer]:
-        base_url = self.config["base_url"]
-        wday_path = self.config["wday_path"]
-        offers = []
-        seen_ids = set()
+        api_url = self._api_url()
+        crawl = self._crawl(keywords)
+        with ThreadPoolExecutor(max_workers=self._concurrency(), thread_name_prefix="workday") as pool:
+            try:
+                requests = next(crawl)
+                while True:
+                    pages = list(pool.map(lambda r: self._fetch_page(api_url, *r), requests))
+                    requests = crawl.send(pages)
+            except StopIteration as done:
+                return done.value
+
+    async def scrape_async(self, keywords: List[str]) -> List[JobOffer]:
+        api_url = self._api_url()
+        semaphore = asyncio.Semaphore(self._concurrency())
 
-        queries = self._build_search_queries(keywords)
-        queries = queries[:12]
+        async def fetch(search, offset):
+            async with semaphore:
+                return await self._fetch_page_async(api_url, search, offset)
 
-        for query in queries:
-            page_offers = self._search(base_url, wday_path, query, seen_ids)
-            offers.extend(page_offers)
+        crawl = self._crawl(keywords)
+        try:
+            requests = next(crawl)
+            while True:
+                requests = crawl.send(await asyncio.gather(*(fetch(*r) for r in requests)))
+        except StopIteration as done:
+            return done.value
+
+    def _crawl(self, keywords):
+        """
+        Search plan shared by scrape() and scrape_async(): yields lists of
+        (search, offset) page requests, receives the decoded pages (None on
+        failure) in the same order, and returns the offers.
+        """
+        searches = None
+        facets_key = self._api_url()
+        if self.config.get("search_mode", WORKDAY_SEARCH_MODE) == "facets":
+            applied = self.facet_cache.get(facets_key)
+            cached = applied is not None
+            if not cached:
+                (metadata,) = yield [(ALL_JOBS, 0)]
+                applied = self._learn_facets(facets_key, metadata)
+            if applied:
+                searches = [("", applied)]
+                first_pages = yield [(search, 0) for search in searches]
+                if cached and not (first_pages[0] and first_pages[0].get("jobPostings")):
+                    # Facet ids may have changed: learn them again next run
+                    logger.info(f"[Workday/{self.company_name}] Cached facets found nothing, falling back to keywords")
+                    self.facet_cache.forget(facets_key)
+                    searches = None
+
+        if searches is not None:
+            requests, rest = yield from self._page_until_known(searches, first_pages)
+            if None in first_pages or None in rest:
+                self.planner.mark_incomplete(self.company_name)  # a failed page may have held open offers
+            offers = [o for found in self._merge(searches, first_pages, requests, rest, set()) for o in found]
+        else:
+            offers = yield from self._crawl_queries(keywords)
 
         logger.info(f"[Workday/{self.company_name}] Total unique offers: {len(offers)}")
         return offers
 
-    def _search(self, base_url: str, wday_path: str, query: str, seen_ids: set) -> List[JobOffer]:
-        offers = []
+    def _crawl_queries(self, keywords):
+        """Keyword searches of the query plan, in waves of `concurrency` queries."""
+        plan = self._plan_queries(keywords, max_queries=MAX_QUERIES)
+        queries = iter(plan)
+        offers, seen_ids = [], set()
+        while True:
+            wave = list(islice(queries, self._concurrency()))
+            if not wave:
+                return offers
+            searches = [(query, {}) for query in wave]
+            first_pages = yield [(search, 0) for search in searches]
+            requests = self._remaining_pages(searches, first_pages)
+            rest = yield [(searches[i], offset) for i, offset in requests]
+            found = self._merge(searches, first_pages, requests, rest, seen_ids)
+            for i, query in enumerate(wave):
+                pages = [first_pages[i]] + [data for (j, _), data in zip(requests, rest) if j == i]
+                # A failed page may have held offers still open: the query was not read to the end
+                plan.record(query, unseen=len(found[i]), requests=len(pages), complete=None not in pages)
+                offers.extend(found[i])
+
+    def _page_until_known(self, searches, first_pages):
+        """
+        Remaining pages of a newest-first search, `concurrency` at a time,
+        until a page whose postings were all read by earlier runs. Returns
+        (requests, pages) like one _remaining_pages() batch would.
+        """
+        requests = self._remaining_pages(searches, first_pages)
+        pages = []
+        step = self._concurrency()
+        known = self._page_known(self._posting_ids(first_pages[0]))
+        while not known and len(pages) < len(requests):
+            batch = requests[len(pages):len(pages) + step]
+            batch_pages = yield [(searches[i], offset) for i, offset in batch]
+            pages.extend(batch_pages)
+            known = any([self._page_known(self._posting_ids(data)) for data in batch_pages])
+        if len(pages) < len(requests):
+            # The pages left list postings earlier runs read: the search still counts as read to the end
+            logger.info(f"[Workday/{self.company_name}] Page already read, stopping after {len(pages) + 1} page(s)")
+        return requests[:len(pages)], pages
+
+    @staticmethod
+    def _posting_id(posting) -> str:
+        return posting.get("externalPath", "") or posting.get("bulletFields", [""])[0]
+
+    def _posting_ids(self, data) -> list:
+        return [self._posting_id(p) for p in (data or {}).get("jobPostings", ())]
 
-        # Determine the Workday host from the base_url
+    def _learn_facets(self, key, metadata):
+        """Pick intern and location facets from an unfiltered search and cache them."""
+        if not metadata:
+            return None  # request failed: keywords this run, try again next run
+        facets = metadata.get("facets", [])
+        applied, labels = {}, []
+        intern = _best_facet(facets, INTERN_RE)
+        if intern:
+            location = _best_facet(facets, LOCATION_RE, exclude=intern[0])
+            for parameter, values in filter(None, [intern, location]):
+                applied[parameter] = [v["id"] for v in values]
+                labels.extend(v.get("descriptor", "") for v in values)
+        self.facet_cache.put(key, applied, labels)
+        if applied:
+            logger.info(f"[Workday/{self.company_name}] Searching facets: {', '.join(sorted(labels))}")
+        else:
+            logger.info(f"[Workday/{self.company_name}] No intern facet, searching keywords")
+        return applied
+
+    def _concurrency(self) -> int:
+        return max(1, int(self.config.get("concurrency", WORKDAY_CONCURRENCY)))
+
+    def _api_url(self) -> str:
         # e.g., https://barclays.wd3.myworkdayjobs.com/en-US/external_career_site_barclays
         # API: https://barclays.wd3.myworkdayjobs.com/wday/cxs/barclays/external_career_site_barclays/jobs
-        from urllib.parse import urlparse
-        parsed = urlparse(base_url)
-        host = f"{parsed.scheme}://{parsed.netloc}"
-        api_url = f"{host}/wday/cxs/{wday_path}/jobs"
+        parsed = urlparse(self.config["base_url"])
+        return f"{parsed.scheme}://{parsed.netloc}/wday/cxs/{self.config['wday_path']}/jobs"
 
-        offset = 0
-        limit = 20
+    @staticmethod
+    def _payload(search, offset: int) -> dict:
+        text, applied = search
+        return {"appliedFacets": applied, "limit": PAGE_SIZE, "offset": offset, "searchText": text}
 
-        while True:
-            payload = {
-                "appliedFacets": {},
-                "limit": limit,
-                "offset": offset,
-                "searchText": query,
-            }
+    def _fetch_page(self, api_url: str, search, offset: int):
+        resp = self._safe_post(api_url, json=self._payload(search, offset), headers=HEADERS)
+        return self._page_data(resp, search)
 
-            resp = self._safe_post(
-                api_url,
-                json=payload,
-                headers={
-                    "Content-Type": "application/json",
-                    "Accept": "application/json",
-                },
-            )
-            if not resp:
-                break
+    async def _fetch_page_async(self, api_url: str, search, offset: int):
+        resp = await self._safe_post_async(api_url, json=self._payload(search, offset), headers=HEADERS)
+        return self._page_data(resp, search)
 
-            try:
-                data = resp.json()
-            except Exception:
-                logger.warning(f"[Workday/{self.company_name}] Invalid JSON for query '{query}'")
-                break
-
-            job_postings = data.get("jobPostings", [])
-            if not job_postings:
-                break
-
-            for posting in job_postings:
-                external_path = posting.get("externalPath", "")
-                job_id = external_path or posting.get("bulletFields", [""])[0]
-
-                if job_id in seen_ids:
-                    continue
-                seen_ids.add(job_id)
-
-                job_url = f"{base_url}{external_path}" if external_path else base_url
-
-                # Extract info from bulletFields (often contains location, date, etc.)
-                bullet_fields = posting.get("bulletFields", [])
-                location = bullet_fields[0] if bullet_fields else ""
-                posted_on = bullet_fields[1] if len(bullet_fields) > 1 else ""
-
-                offer = JobOffer(
-                    title=posting.get("title", ""),
-                    company=self.company_name,
-                    location=posting.get("locationsText", location),
-                    url=job_url,
-                    date_posted=posting.get("postedOn", posted_on),
-                    description_snippet="",
-                    source="workday",
-                    job_type=posting.get("subtitleText", ""),
-                    duration=None,
-                    department=None,
-                )
-                offers.append(offer)
-
-            total = data.get("total", 0)
-            offset += limit
-            if offset >= total or offset >= 200:
-                break
+    def _page_data(self, resp, search):
+        """Decoded page, or None if the request failed."""
+        if not resp:
+            return None
+        try:
+            return resp.json()
+        except Exception:
+            logger.warning(f"[Workday/{self.company_name}] Invalid JSON for query '{search[0] or 'facets'}'")
+            return None
+
+    @staticmethod
+    def _remaining_pages(searches, first_pages) -> list:
+        """(search index, offset) of every page after the first that a search's total calls for."""
+        requests = []
+        for i, ((text, _), data) in enumerate(zip(searches, first_pages)):
+            if not data or not data.get("jobPostings"):
+                continue
+            total = min(data.get("total", 0), MAX_OFFSET if text else FACETS_MAX_OFFSET)
+            requests.extend((i, offset) for offset in range(PAGE_SIZE, total, PAGE_SIZE))
+        return requests
 
+    def _merge(self, searches, first_pages, requests, rest, seen_ids) -> list:
+        """Offers of each search, deduplicated in search and page order against `seen_ids`."""
+        pages = [[data] for data in first_pages]
+        for (i, _), data in zip(requests, rest):
+            pages[i].append(data)
+
+        found = []
+        for (text, _), search_pages in zip(searches, pages):
+            offers = []
+            for data in search_pages:
+                if data:
+                    offers.extend(self._parse_postings(data.get("jobPostings", []), text, seen_ids))
+            found.append(offers)
+        return found
+
+    def _parse_postings(self, job_postings, query: str, seen_ids: set) -> List[JobOffer]:
+        base_url = self.config["base_url"]
+        offers = []
+        for posting in job_postings:
+            external_path = posting.get("externalPath", "")
+            job_id = self._posting_id(posting)
+
+            if job_id in seen_ids:
+                continue
+            seen_ids.add(job_id)
+
+            job_url = f"{base_url}{external_path}" if external_path else base_url
+
+            # Extract info from bulletFields (often contains location, date, etc.)
+            bullet_fields = posting.get("bulletFields", [])
+            location = bullet_fields[0] if bullet_fields else ""
+            posted_on = bullet_fields[1] if len(bullet_fields) > 1 else ""
+
+            offer = JobOffer(
+                title=posting.get("title", ""),
+                company=self.company_name,
+                location=posting.get("locationsText", location),
+                url=job_url,
+                date_posted=posting.get("postedOn", posted_on),
+                description_snippet="",
+                source="workday",
+                search_query=query,
+                job_type=posting.get("subtitleText", ""),
+                duration=None,
+                department=None,
+            )
+            offers.append(offer)
         return offers
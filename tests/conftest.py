@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Modules import each other from the project root, as main.py runs them
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,65 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from main import diff_offers
+from scrapers.base import JobOffer
+from utils.dedup import DeduplicationManager
+from utils.offer_store import OfferStore
+from utils.query_planner import QueryPlanner
+
+MONDAY = datetime(2026, 10, 12, 6, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = OfferStore(tmp_path / "offers.sqlite")
+    yield store
+    store.close()
+
+
+@pytest.fixture
+def dedup(tmp_path):
+    dedup = DeduplicationManager(tmp_path / "seen_hashes.bin")
+    yield dedup
+    dedup.close()
+
+
+def linkedin_offer():
+    return JobOffer(
+        title="Summer Analyst - Structuring", company="BNP Paribas", location="Paris",
+        url="https://www.linkedin.com/jobs/view/123", source="linkedin", search_query="stage structuring",
+    )
+
+
+def run(store, dedup, offers, now, errors=()):
+    return diff_offers(store, dedup, offers, [], list(errors), QueryPlanner(), now=now)
+
+
+def test_missing_aggregator_offer_stays_open_within_the_search_window(store, dedup):
+    run(store, dedup, [linkedin_offer()], MONDAY)
+    run_diff = run(store, dedup, [], MONDAY + timedelta(days=1))
+    assert run_diff.closed == []
+
+
+def test_missing_aggregator_offer_closes_after_the_search_window(store, dedup):
+    offer = linkedin_offer()
+    run(store, dedup, [offer], MONDAY)
+    run_diff = run(store, dedup, [], MONDAY + timedelta(days=4))
+    offer_id = dedup.compute_hash(offer.url, offer.title)
+    assert run_diff.closed == [(offer_id, offer.company, offer.title, offer.url)]
+
+
+def test_aggregator_offer_stays_open_when_the_aggregators_failed(store, dedup):
+    run(store, dedup, [linkedin_offer()], MONDAY)
+    errors = [{"company": "aggregators", "scraper": "aggregators", "error": "timeout"}]
+    run_diff = run(store, dedup, [], MONDAY + timedelta(days=4), errors)
+    assert run_diff.closed == []
+
+
+def test_offers_unseen_for_the_ttl_are_forgotten(store, dedup):
+    run(store, dedup, [linkedin_offer()], MONDAY)
+    run(store, dedup, [], MONDAY + timedelta(days=4))
+    run_diff = run(store, dedup, [linkedin_offer()], MONDAY + timedelta(days=400))
+    assert len(run_diff.appeared) == 1
+    assert store._conn.execute("SELECT first_seen FROM liveness").fetchone()[0] > MONDAY.isoformat()
@@ -0,0 +1,34 @@
+import pytest
+
+from utils.offer_store import OfferStore
+
+
+def row(offer_id, title, company, score):
+    return {
+        "id": offer_id, "title": title, "company": company, "location": "Paris",
+        "url": f"https://example.com/{offer_id}", "date_scraped": "2026-10-12T06:00:00+00:00",
+        "source": "workday", "relevance_score": score, "status": "new",
+    }
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = OfferStore(tmp_path / "offers.sqlite")
+    store.add([
+        row("a", "Structuring intern", "BNP Paribas", 0.55),
+        row("b", "Sales intern BNP Paribas CIB", "BNP Paribas", 0.28),
+        row("c", "Trading intern", "BNP Paribas Corporate and Institutional Banking", 0.65),
+        row("d", "Trading intern", "Natixis", 0.9),
+    ], "internships_2026-10-12.csv")
+    yield store
+    store.close()
+
+
+def test_company_only_query_is_sorted_by_score(store):
+    results = store.search(company="bnp")
+    assert [r["relevance_score"] for r, _ in results] == ["0.65", "0.55", "0.28"]
+
+
+def test_query_with_words_is_sorted_by_match(store):
+    results = store.search("bnp")
+    assert results[0][0]["id"] == "b"
@@ -0,0 +1,135 @@
+import asyncio
+import logging
+
+import httpx
+
+from utils.http_client import (
+    RETRY_STATUSES, backoff, cache_lookup, cache_store, request_headers, request_key, retry_delay,
+)
+from utils.rate_limiter import HostRateLimiter, host_of
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncHttpClient:
+    """
+    asyncio counterpart of HttpClient built on httpx.AsyncClient.
+    Exposes the same get/post surface (as coroutines) and returns httpx responses,
+    which offer the same .status_code/.text/.json()/.headers/.raise_for_status()
+    the scrapers use. A single pooled keep-alive client serves every host, and
+    politeness goes through a HostRateLimiter that can be shared with HttpClient.
+
+    Usage:
+        async with AsyncHttpClient(rate_limiter=http_client.rate_limiter) as client:
+            resp = await client.get(url)
+    """
+
+    def __init__(self, min_delay=1.0, max_delay=3.0, max_retries=3, timeout=30,
+                 max_connections=200, burst=1, max_retry_after=120, rate_limiter=None,
+                 cache=None, cache_ttl=0, recorder=None):
+        self.rate_limiter = rate_limiter or HostRateLimiter(
+            min_delay=min_delay, max_delay=max_delay, burst=burst,
+        )
+        self.max_retries = max_retries
+        self.max_retry_after = max_retry_after
+        self.timeout = timeout
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+        )
+        self.cache = cache  # optional HttpCache, may be shared with HttpClient
+        self.cache_ttl = cache_ttl
+        self.recorder = recorder  # optional HttpRecorder, may be shared with HttpClient
+        self._client = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    def _get_client(self):
+        # Created lazily so the connection pool belongs to the running event loop
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                limits=self.limits,
+                timeout=self.timeout,
+                follow_redirects=True,
+            )
+        return self._client
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def request(self, method, url, cache_ttl=None, **kwargs):
+        key = request_key(method, url, kwargs)
+        if self.recorder is not None and self.recorder.replaying:
+            # Offline: no network, no politeness delay
+            status, headers, body = self.recorder.replay(key, method, url)
+            return self._build_response(status, headers, body, method, url)
+
+        headers = request_headers(kwargs.pop("headers", None))
+        timeout = kwargs.pop("timeout", self.timeout)
+
+        resp = await self._fetch(method, url, key, cache_ttl, headers, timeout, **kwargs)
+        if self.recorder is not None:
+            self.recorder.record(key, method, url, resp.status_code, resp.headers, resp.content)
+        return resp
+
+    async def _fetch(self, method, url, key, cache_ttl, headers, timeout, **kwargs):
+        if self.cache is None:
+            return await self._send(method, url, headers, timeout, **kwargs)
+
+        # The cache is SQLite: its reads and writes run in threads, off the event loop
+        ttl = self.cache_ttl if cache_ttl is None else cache_ttl
+        entry, fresh = await asyncio.to_thread(cache_lookup, self.cache, key, ttl, headers)
+        if fresh:
+            return self._cached_response(entry, method, url)
+
+        resp = await self._send(method, url, headers, timeout, **kwargs)
+        if await asyncio.to_thread(cache_store, self.cache, key, url, resp, entry, ttl):
+            return self._cached_response(entry, method, url)
+        return resp
+
+    async def _send(self, method, url, headers, timeout, **kwargs):
+        client = self._get_client()
+        for attempt in range(self.max_retries + 1):
+            await self.rate_limiter.wait_async(url)
+            try:
+                resp = await client.request(method, url, headers=headers, timeout=timeout, **kwargs)
+            except httpx.TransportError:
+                if attempt == self.max_retries:
+                    raise
+                await asyncio.sleep(backoff(attempt))
+                continue
+
+            if attempt == self.max_retries:
+                return resp
+            if resp.status_code == 429:
+                delay = retry_delay(resp, attempt, self.max_retry_after)
+                if delay is None:
+                    return resp
+                logger.info(f"429 from {host_of(url)}, pausing host for {delay:.1f}s")
+                self.rate_limiter.block(url, delay)
+            elif resp.status_code in RETRY_STATUSES:
+                await asyncio.sleep(backoff(attempt))
+            else:
+                return resp
+        return resp
+
+    @staticmethod
+    def _build_response(status, headers, body, method, url):
+        return httpx.Response(status, headers=headers, content=body, request=httpx.Request(method, url))
+
+    def _cached_response(self, entry, method, url):
+        resp = self._build_response(entry.status, entry.headers, entry.body, method, url)
+        resp.from_cache = True
+        return resp
+
+    async def get(self, url, **kwargs):
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url, **kwargs):
+        return await self.request("POST", url, **kwargs)
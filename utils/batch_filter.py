@@ -0,0 +1,173 @@
+"""
+Vectorized counterpart of JobFilter for bulk re-scoring of stored offers.
+Evaluates the same rules column-wise over the compiled patterns of
+utils.filters, scanning each distinct value once, and produces the same
+decisions, durations and scores as the scalar path (checked by
+benchmarks/check_filter.py).
+"""
+
+import logging
+from operator import attrgetter
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from utils.filters import (
+    ROLE_RE,
+    ROLE_KEYWORDS_LOWER,
+    INTERNSHIP_RE,
+    EXCLUDE_TITLE_RE,
+    EXCLUDE_COMPANIES_RE,
+    EXCLUDE_DURATION_RE,
+    DURATION_RES,
+    NON_STAGE_TYPES_RE,
+    NON_STAGE_TITLE_RE,
+    MARKETS_DEPARTMENTS_RE,
+    classify_location,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _text(df, column):
+    """Column as str, with missing values (and pandas' "nan" artefacts) as empty strings."""
+    if column not in df:
+        return pd.Series("", index=df.index)
+    return df[column].fillna("").astype(str).replace("nan", "")
+
+
+def _per_unique(series, fn, dtype=object):
+    """
+    Apply `fn` once per distinct value of `series` and broadcast the results
+    back to every row. Stored offers repeat heavily (same company, location,
+    title across daily files), so this does far fewer regex scans than a
+    row-wise str.contains.
+    """
+    codes, uniques = pd.factorize(series)
+    values = np.fromiter(map(fn, uniques.tolist()), dtype=dtype, count=len(uniques))
+    return pd.Series(values[codes], index=series.index)
+
+
+def _contains(series, pattern):
+    return _per_unique(series, lambda s: pattern.search(s) is not None, dtype=bool)
+
+
+def _keyword_count(text):
+    return sum(kw in text for kw in ROLE_KEYWORDS_LOWER)
+
+
+def _first_duration(text):
+    for pattern in DURATION_RES:
+        match = pattern.search(text)
+        if match:
+            return match.group(0)
+    return ""
+
+
+class BatchJobFilter:
+    def evaluate(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Evaluate every row. Returns a frame aligned with `df` holding
+        `keep` (row passes all filters), `duration` and `relevance_score`
+        (as filter_and_score would set them).
+        """
+        title = _text(df, "title")
+        snippet = _text(df, "description_snippet")
+        duration_in = _text(df, "duration")
+        title_l = title.str.lower()
+        text_l = (title + " " + snippet).str.lower()
+        job_type_l = _text(df, "job_type").str.lower()
+        text_type_l = text_l + " " + job_type_l
+        location_l = _text(df, "location").str.lower()
+        company_l = _text(df, "company").str.lower()
+        dept_l = _text(df, "department").str.lower()
+
+        # Step 0: non-stage job types / title markers ("poste" is fine next to "stage"/"stagiaire")
+        non_stage = (
+            _contains(job_type_l, NON_STAGE_TYPES_RE)
+            | _contains(title_l, NON_STAGE_TITLE_RE)
+            | _per_unique(
+                title_l,
+                lambda t: "poste" in t and "stage" not in t and "stagiaire" not in t,
+                dtype=bool,
+            )
+        )
+
+        # Step 1: title / company / duration exclusions
+        excluded = (
+            _contains(title_l, EXCLUDE_TITLE_RE)
+            | _contains(company_l, EXCLUDE_COMPANIES_RE)
+            | _contains(text_l, EXCLUDE_DURATION_RE)
+        )
+
+        # Step 2: location exclusions (secondary French cities, UK outside London/Dublin)
+        verdicts = _per_unique(location_l, classify_location)
+        location_excluded = verdicts.map(attrgetter("excluded")).astype(bool)
+
+        # Step 3: internship or role keywords
+        internship = _contains(text_type_l, INTERNSHIP_RE)
+        keep = ~non_stage & ~excluded & ~location_excluded & (internship | _contains(text_l, ROLE_RE))
+
+        # Duration: first pattern (in priority order) found in snippet + stored duration
+        detected = _per_unique(snippet + " " + duration_in, _first_duration)
+
+        # Score, accumulated in the same order as JobFilter.compute_relevance_score
+        kw_count = _per_unique(text_l, _keyword_count, dtype=np.int64).to_numpy()
+        location_bonus = verdicts.map(attrgetter("bonus")).to_numpy(dtype=float)
+        score = np.zeros(len(df))
+        score += np.where(_contains(title_l, ROLE_RE), 0.3, 0.0)
+        score += np.minimum(kw_count * 0.05, 0.2)
+        score += np.where(internship, 0.2, 0.0)
+        score += np.where(detected != "", 0.15, 0.0)
+        score += location_bonus
+        score += np.where(_contains(dept_l, MARKETS_DEPARTMENTS_RE), 0.05, 0.0)
+        # Python's round() (not np.round) so ties round exactly like the scalar path
+        relevance = [min(round(s, 2), 1.0) for s in score.tolist()]
+
+        return pd.DataFrame({
+            "keep": keep.to_numpy(),
+            "duration": detected.where(detected != "", duration_in),
+            "relevance_score": relevance,
+        }, index=df.index)
+
+    def filter_and_score(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Kept rows with updated duration/relevance_score, best first (ties keep input order)."""
+        result = self.evaluate(df)
+        kept = df.loc[result["keep"]].copy()
+        kept["duration"] = result.loc[result["keep"], "duration"]
+        kept["relevance_score"] = result.loc[result["keep"], "relevance_score"]
+        return kept.sort_values("relevance_score", ascending=False, kind="stable")
+
+
+def rescore_files(data_dir="data", drop_excluded=False, dry_run=False) -> dict:
+    """
+    Re-run the current filters over every stored data/internships*.csv:
+    rewrite duration and relevance_score, and optionally drop rows that
+    the current keyword lists would now reject.
+    """
+    batch_filter = BatchJobFilter()
+    summary = {"files": 0, "rows": 0, "rescored": 0, "now_excluded": 0}
+    for path in sorted(Path(data_dir).glob("internships*.csv")):
+        df = pd.read_csv(path, dtype=str, keep_default_na=False)
+        if df.empty:
+            continue
+        result = batch_filter.evaluate(df)
+        old_scores = pd.to_numeric(df["relevance_score"], errors="coerce")
+        changed = int((old_scores != result["relevance_score"]).sum())
+        excluded = int((~result["keep"]).sum())
+
+        summary["files"] += 1
+        summary["rows"] += len(df)
+        summary["rescored"] += changed
+        summary["now_excluded"] += excluded
+        logger.info(f"{path.name}: {len(df)} rows, {changed} new scores, {excluded} now excluded")
+
+        if dry_run:
+            continue
+        df["duration"] = result["duration"]
+        df["relevance_score"] = result["relevance_score"]
+        if drop_excluded:
+            df = df.loc[result["keep"]]
+        df.to_csv(path, index=False)
+    return summary
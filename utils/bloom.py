@@ -0,0 +1,80 @@
+import math
+import os
+import struct
+from pathlib import Path
+
+MAGIC = b"BLOM"
+VERSION = 1
+HEADER = struct.Struct("<4sHHQQ")  # magic, version, hash count, bit count, items added
+
+_MASK32 = 0xFFFFFFFF
+
+
+class BloomFilter:
+    """
+    Bloom filter over 64-bit integers that are already uniformly distributed
+    hashes (DeduplicationManager hashes): the k probe positions are derived by
+    double hashing from the two 32-bit halves, no rehashing needed.
+    """
+
+    def __init__(self, capacity, error_rate=0.01):
+        capacity = max(int(capacity), 1)
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def add(self, value):
+        bits, m = self.bits, self.num_bits
+        h1, h2 = value & _MASK32, (value >> 32) | 1
+        for _ in range(self.num_hashes):
+            pos = h1 % m
+            bits[pos >> 3] |= 1 << (pos & 7)
+            h1 += h2
+        self.count += 1
+
+    def update(self, values):
+        for value in values:
+            self.add(value)
+
+    def __contains__(self, value) -> bool:
+        # Stops at the first clear bit: a new hash usually costs one or two probes
+        bits, m = self.bits, self.num_bits
+        h1, h2 = value & _MASK32, (value >> 32) | 1
+        for _ in range(self.num_hashes):
+            pos = h1 % m
+            if not bits[pos >> 3] >> (pos & 7) & 1:
+                return False
+            h1 += h2
+        return True
+
+    @property
+    def full(self) -> bool:
+        return self.count > self.capacity
+
+    def save(self, path):
+        path = Path(path)
+        tmp = path.with_name(path.name + ".tmp")  # seen_hashes.bloom.tmp: not shared with the base file
+        with open(tmp, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, self.num_hashes, self.num_bits, self.count))
+            f.write(self.bits)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path, error_rate=0.01):
+        """Return the filter stored at `path`, or None if missing or unreadable."""
+        try:
+            data = Path(path).read_bytes()
+            magic, version, num_hashes, num_bits, count = HEADER.unpack_from(data)
+        except (OSError, struct.error):
+            return None
+        if magic != MAGIC or version != VERSION or len(data) != HEADER.size + (num_bits + 7) // 8:
+            return None
+        bloom = cls.__new__(cls)
+        bloom.num_hashes, bloom.num_bits, bloom.count = num_hashes, num_bits, count
+        bloom.error_rate = error_rate
+        bloom.capacity = max(1, round(num_bits * math.log(2) ** 2 / -math.log(error_rate)))
+        bloom.bits = bytearray(data[HEADER.size:])
+        return bloom
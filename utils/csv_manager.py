@@ -1,33 +1,89 @@
-import pandas as pd
+import csv
+import itertools
+import os
 from pathlib import Path
-from datetime import datetime, timezone
+from datetime import date, datetime, timezone
+
+from utils.dedup import day_number
+from utils.offer_store import COLUMNS
 
 
 class CSVManager:
-    COLUMNS = [
-        "id", "title", "company", "location", "url", "date_posted",
-        "date_scraped", "description_snippet", "source", "job_type",
-        "duration", "department", "relevance_score", "status",
-    ]
+    COLUMNS = COLUMNS
+    # Separator of the URLs listed in duplicate_urls
+    URL_SEPARATOR = " | "
 
-    def __init__(self, csv_dir="data"):
+    def __init__(self, csv_dir="data", store=None):
         self.csv_dir = Path(csv_dir)
+        self.store = store
         # Each run creates a new file with today's date
         today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
         self.csv_path = self.csv_dir / f"internships_{today}.csv"
 
-    def save_offers(self, new_offers, dedup_manager) -> int:
-        """Save today's offers to a new dated CSV file (no appending to old files)."""
-        added_count = 0
-        rows = []
+    def save_offers(self, new_offers, dedup_manager, near_dups=None) -> int:
+        """
+        Save today's offers to a new dated CSV file (no appending to old files),
+        streaming rows as offers pass dedup. The file is fsync'd before the
+        offers are marked seen, so an interrupted run never records an offer
+        as seen without saving it.
+        With an OfferStore, the offers are inserted there in one transaction
+        and the dated CSV is exported from it.
+
+        With a NearDuplicateIndex, near-duplicate copies of an offer (same
+        posting from another source) are not saved: their URLs go to the
+        kept offer's duplicate_urls column, or to the index links when the
+        offer was saved by an earlier run.
+        """
+        candidates = self._new_candidates(new_offers, dedup_manager)
+        dropped = []
+        if near_dups is not None:
+            kept, dropped = near_dups.collapse(list(candidates))
+        else:
+            kept = ((offer_id, offer, []) for offer_id, offer in candidates)
+
+        saved = []  # (offer_id, offer) of every row written
+        rows = self._rows(kept, saved)
+        first = next(rows, None)
+        if first is not None:
+            rows = itertools.chain([first], rows)
+            if self.store is not None:
+                self.store.add(rows, self.csv_path.name)
+                self.store.export_csv(self.csv_path.name, self.csv_path)
+            else:
+                self._write_csv(rows)
+        for offer_id, _ in saved:
+            dedup_manager.mark_hash(offer_id)
+
+        # Near-duplicates count as seen too, and are linked to the offer they copy
+        for offer_id, offer, original_id in dropped:
+            dedup_manager.mark_hash(offer_id)
+        dedup_manager.flush()
+        if near_dups is not None:
+            for offer_id, offer in saved:
+                near_dups.add(offer_id, offer.company, offer.title, offer.location or "", offer.url, offer.source)
+            for offer_id, offer, original_id in dropped:
+                near_dups.link(original_id, offer.url)
+            near_dups.commit()
+
+        return len(saved)
 
+    @staticmethod
+    def _new_candidates(new_offers, dedup_manager):
+        """Yield (offer_id, offer) for offers neither seen before nor repeated in the batch."""
+        batch_ids = set()
         for offer in new_offers:
-            if dedup_manager.is_duplicate(offer.url, offer.title):
+            offer_id = dedup_manager.compute_hash(offer.url, offer.title)
+            if offer_id in batch_ids or dedup_manager.is_duplicate(offer.url, offer.title):
                 continue
+            batch_ids.add(offer_id)
+            yield offer_id, offer
 
-            dedup_manager.mark_seen(offer.url, offer.title)
-            rows.append({
-                "id": dedup_manager.compute_hash(offer.url, offer.title),
+    def _rows(self, kept, saved):
+        """Yield the CSV row of each kept offer, recording it in `saved`."""
+        for offer_id, offer, duplicate_urls in kept:
+            saved.append((offer_id, offer))
+            yield {
+                "id": offer_id,
                 "title": offer.title,
                 "company": offer.company,
                 "location": offer.location or "",
@@ -41,12 +97,57 @@ class CSVManager:
                 "department": offer.department or "",
                 "relevance_score": round(offer.relevance_score, 2),
                 "status": "new",
-            })
-            added_count += 1
+                "duplicate_urls": self.URL_SEPARATOR.join(duplicate_urls),
+                "search_query": offer.search_query or "",
+            }
 
-        if rows:
-            new_df = pd.DataFrame(rows, columns=self.COLUMNS)
-            self.csv_dir.mkdir(parents=True, exist_ok=True)
-            new_df.to_csv(self.csv_path, index=False)
+    def _write_csv(self, rows):
+        """Stream rows to today's CSV, fsync'd before returning."""
+        self.csv_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.csv_path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=self.COLUMNS, lineterminator="\n")
+            writer.writeheader()
+            writer.writerows(rows)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def reconcile(self, dedup_manager) -> int:
+        """
+        Mark as seen the offers of the latest CSV whose hashes never reached
+        the dedup journal (run interrupted between the two writes), so they
+        are not listed again. Returns the number of hashes recovered.
+        """
+        files = sorted(self.csv_dir.glob("internships_*.csv"))
+        if not files:
+            return 0
+        with open(files[-1], newline="", encoding="utf-8") as f:
+            # Recompute rather than trust the id column: ids of older files may use an older key scheme
+            ids = [dedup_manager.compute_hash(row["url"], row["title"]) for row in csv.DictReader(f)]
+        missing = [h for h in ids if int(h, 16) not in dedup_manager]
+        for h in missing:
+            dedup_manager.mark_hash(h)
+        dedup_manager.flush()
+        return len(missing)
+
+    def _all_rows(self):
+        if self.store is not None:
+            for row, _ in self.store.rows():
+                yield row
+            return
+        for path in sorted(self.csv_dir.glob("internships*.csv")):
+            with open(path, newline="", encoding="utf-8") as f:
+                yield from csv.DictReader(f)
+
+    def stored_rows(self):
+        """Yield (row dict, day scraped) for every stored row (store or CSVs), oldest files first."""
+        for row in self._all_rows():
+            try:
+                day = day_number(date.fromisoformat(row["date_scraped"][:10]))
+            except (KeyError, TypeError, ValueError):
+                continue
+            yield row, day
 
-        return added_count
+    def stored_offers(self):
+        """Yield (id, url, title, day scraped) for every stored offer."""
+        for row, day in self.stored_rows():
+            yield row.get("id"), row.get("url") or "", row.get("title") or "", day
@@ -1,33 +1,329 @@
+import bisect
 import hashlib
 import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from datetime import date, datetime, timezone
 from pathlib import Path
 
+from utils.bloom import BloomFilter
+from utils.url_canon import canonical_url
+
+# seen_hashes.bin: 16-byte header, then `count` sorted little-endian uint64
+# hashes, then `count` uint16 first-seen days (days since 1970-01-01)
+MAGIC = b"SEEN"
+VERSION = 2
+HEADER = struct.Struct("<4sHHQ")  # magic, version, key scheme, count
+# Version of compute_hash; a store written under another scheme is re-keyed
+# (0/1: raw lowercased URL, 2: canonical_url)
+KEY_SCHEME = 2
+# seen_hashes.delta: append-only (hash, first-seen day) records
+JOURNAL_RECORD = struct.Struct("<QH")
+
+_EPOCH = date(1970, 1, 1)
+
+
+def day_number(d: date) -> int:
+    return (d - _EPOCH).days
+
+
+def today_number() -> int:
+    return day_number(datetime.now(timezone.utc).date())
+
 
 class DeduplicationManager:
-    def __init__(self, hashes_path="data/seen_hashes.json"):
+    """
+    Set of seen offer hashes (64-bit, see compute_hash) with the day each
+    was first seen.
+
+    The bulk of the hashes live in a sorted binary file that is memory-mapped
+    and searched with bisect, so loading costs nothing whatever its size.
+    Hashes added since the last compaction go to an append-only journal
+    (seen_hashes.delta) as soon as they are marked, fsync'd every
+    `sync_every` hashes and on save(), so an interrupted run keeps its
+    progress. The journal is folded into the base file on startup once it
+    holds more than `delta_max` hashes; compaction also evicts hashes first
+    seen more than `ttl_days` ago, so a reposted offer is listed again next
+    season.
+
+    A legacy seen_hashes.json, a version 1 file (no days) or a store keyed
+    with an older compute_hash scheme is migrated on first use from
+    `history()`, which yields (stored id, url, title, day) for every stored
+    offer: known hashes are re-keyed from their url/title and take the day
+    the offer was scraped; unknown ones are kept as they are.
+
+    With `bloom_error_rate` set, a Bloom filter (seen_hashes.bloom, rebuilt
+    whenever it is missing or out of date) answers most lookups of new
+    offers without touching the exact store.
+    """
+
+    def __init__(self, hashes_path="data/seen_hashes.bin", delta_max=4096, bloom_error_rate=None,
+                 sync_every=256, ttl_days=None, history=None):
         self.hashes_path = Path(hashes_path)
-        self.seen = self._load()
+        self.delta_path = self.hashes_path.with_suffix(".delta")
+        self.legacy_path = self.hashes_path.with_suffix(".json")
+        self.bloom_path = self.hashes_path.with_suffix(".bloom")
+        self.delta_max = delta_max
+        self.sync_every = sync_every
+        self.ttl_days = ttl_days
+        self.history = history
+        self.bloom_error_rate = bloom_error_rate
+        self.bloom = None
+        self._file = None
+        self._mmap = None
+        self._base = ()
+        self._base_days = ()
+        self._delta = {}  # hash -> first-seen day, for hashes in the journal
+        self._journal = None
+        self._unsynced = 0
+
+        if not self.hashes_path.exists() and self.legacy_path.exists():
+            self._migrate_legacy()
+        self._open_base()
+        self._delta = self._read_delta()
+        if len(self._delta) > delta_max:
+            self.compact()
+        if bloom_error_rate:
+            self.bloom = BloomFilter.load(self.bloom_path, bloom_error_rate)
+            if self.bloom is None or self.bloom.count != len(self) or self.bloom.full:
+                self._rebuild_bloom()
+
+    def _rebuild_bloom(self):
+        """Size the filter for twice the current history and fill it from the exact store."""
+        self.bloom = BloomFilter(max(2 * len(self), 1024), self.bloom_error_rate)
+        self.bloom.update(self._base)
+        self.bloom.update(self._delta)
 
-    def _load(self):
-        if self.hashes_path.exists():
+    def _rekey(self, first_seen) -> dict:
+        """
+        Map {old hash: first-seen day or None} to the current key scheme using
+        history(). Unknown days default to the history day, then today.
+        """
+        rekeyed = {}
+        covered = set()
+        for stored_id, url, title, day in (self.history() if self.history else ()):
             try:
-                return set(json.loads(self.hashes_path.read_text()))
-            except (json.JSONDecodeError, TypeError):
-                return set()
-        return set()
+                old = int(stored_id, 16)
+            except (TypeError, ValueError):
+                continue
+            if old not in first_seen:
+                continue  # evicted or never seen: don't resurrect it
+            covered.add(old)
+            if first_seen[old] is not None:
+                day = first_seen[old]
+            value = int(self.compute_hash(url, title), 16)
+            rekeyed[value] = min(day, rekeyed.get(value, day))
+        today = today_number()
+        for old, day in first_seen.items():
+            if old not in covered:
+                rekeyed.setdefault(old, today if day is None else day)
+        return rekeyed
 
-    def save(self):
+    def _migrate_legacy(self):
+        try:
+            hashes = json.loads(self.legacy_path.read_text())
+        except (json.JSONDecodeError, TypeError):
+            hashes = []
+        self._write_base(self._rekey({int(h, 16): None for h in hashes}))
+        self.legacy_path.unlink()
+
+    def _migrate_v1(self, count):
+        """Version 1 store: hashes only, journal of bare uint64s."""
+        values = array("Q")
+        with open(self.hashes_path, "rb") as f:
+            f.seek(HEADER.size)
+            values.fromfile(f, count)
+        if self.delta_path.exists():
+            data = self.delta_path.read_bytes()
+            values.frombytes(data[:len(data) - len(data) % 8])
+        if sys.byteorder != "little":
+            values.byteswap()
+        self._write_base(self._rekey(dict.fromkeys(values)))
+        self.delta_path.unlink(missing_ok=True)
+
+    def _open_base(self):
+        if not self.hashes_path.exists():
+            return
+        with open(self.hashes_path, "rb") as f:
+            header = f.read(HEADER.size)
+        if len(header) < HEADER.size:
+            raise ValueError(f"{self.hashes_path}: truncated header")
+        magic, version, key_scheme, count = HEADER.unpack(header)
+        if magic == MAGIC and version == 1:
+            self._migrate_v1(count)
+            return self._open_base()
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{self.hashes_path}: not a version {VERSION} hash store")
+        if key_scheme != KEY_SCHEME:
+            self._open_base_file(count)
+            self._delta = self._read_delta()
+            self._migrate_key_scheme()
+            return self._open_base()
+        self._open_base_file(count)
+
+    def _migrate_key_scheme(self):
+        """Re-key a store (and its journal) written with an older compute_hash."""
+        first_seen = dict(zip(self._base, self._base_days))
+        for value, day in self._delta.items():
+            first_seen.setdefault(value, day)
+        self._close_base()
+        self._write_base(self._rekey(first_seen))
+        self.delta_path.unlink(missing_ok=True)
+        self._delta = {}
+
+    def _open_base_file(self, count):
+        if count == 0:
+            return
+        days_offset = HEADER.size + count * 8
+        if sys.byteorder != "little":
+            values, days = array("Q"), array("H")
+            with open(self.hashes_path, "rb") as f:
+                f.seek(HEADER.size)
+                values.fromfile(f, count)
+                days.fromfile(f, count)
+            values.byteswap()
+            days.byteswap()
+            self._base, self._base_days = values, days
+            return
+        self._file = open(self.hashes_path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._mmap)
+        self._base = view[HEADER.size:days_offset].cast("Q")
+        self._base_days = view[days_offset:days_offset + count * 2].cast("H")
+        view.release()
+
+    def _close_base(self):
+        for view in (self._base, self._base_days):
+            if isinstance(view, memoryview):
+                view.release()
+        self._base = self._base_days = ()
+        if self._mmap is not None:
+            self._mmap.close()
+            self._file.close()
+            self._mmap = self._file = None
+
+    def _read_delta(self) -> dict:
+        if not self.delta_path.exists():
+            return {}
+        data = self.delta_path.read_bytes()
+        torn = len(data) % JOURNAL_RECORD.size
+        if torn:
+            # Drop a partial trailing write so new appends stay aligned
+            data = data[:-torn]
+            with open(self.delta_path, "r+b") as f:
+                f.truncate(len(data))
+        delta = {}
+        for value, day in JOURNAL_RECORD.iter_unpack(data):
+            delta.setdefault(value, day)
+        return delta
+
+    def _write_base(self, first_seen):
+        """Atomically replace the base file with the given {hash: first-seen day}."""
+        hashes = array("Q", sorted(first_seen))
+        days = array("H", (first_seen[h] for h in hashes))
+        if sys.byteorder != "little":
+            hashes.byteswap()
+            days.byteswap()
         self.hashes_path.parent.mkdir(parents=True, exist_ok=True)
-        self.hashes_path.write_text(json.dumps(sorted(self.seen), indent=2))
+        tmp = self.hashes_path.with_name(self.hashes_path.name + ".tmp")  # seen_hashes.bin.tmp, not shared with the bloom filter
+        with open(tmp, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, KEY_SCHEME, len(hashes)))
+            hashes.tofile(f)
+            days.tofile(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.hashes_path)
+
+    def _in_base(self, value) -> bool:
+        i = bisect.bisect_left(self._base, value)
+        return i < len(self._base) and self._base[i] == value
+
+    def __contains__(self, value) -> bool:
+        if self.bloom is not None and value not in self.bloom:
+            return False
+        return value in self._delta or self._in_base(value)
+
+    def __len__(self) -> int:
+        return len(self._base) + len(self._delta)
+
+    def _append(self, value, day):
+        if self._journal is None:
+            self.delta_path.parent.mkdir(parents=True, exist_ok=True)
+            self._journal = open(self.delta_path, "ab")
+        self._journal.write(JOURNAL_RECORD.pack(value, day))
+        self._unsynced += 1
+        if self._unsynced >= self.sync_every:
+            self.flush()
+
+    def flush(self):
+        """Make every journaled hash durable."""
+        if self._journal is not None and self._unsynced:
+            self._journal.flush()
+            os.fsync(self._journal.fileno())
+        self._unsynced = 0
+
+    def save(self):
+        self.flush()
+        if self.bloom is not None:
+            if self.bloom.full:
+                self._rebuild_bloom()
+            self.bloom.save(self.bloom_path)
+
+    def compact(self, ttl_days=None) -> int:
+        """
+        Fold the journal into the sorted base file and truncate it, dropping
+        hashes first seen more than `ttl_days` (default: self.ttl_days) ago.
+        Returns the number of hashes evicted.
+        """
+        ttl_days = self.ttl_days if ttl_days is None else ttl_days
+        self._close_journal()
+        first_seen = dict(zip(self._base, self._base_days))
+        for value, day in self._delta.items():
+            first_seen.setdefault(value, day)
+        total = len(first_seen)
+        if ttl_days:
+            cutoff = today_number() - ttl_days
+            first_seen = {h: day for h, day in first_seen.items() if day >= cutoff}
+        self._close_base()
+        self._write_base(first_seen)
+        self.delta_path.unlink(missing_ok=True)
+        self._delta = {}
+        self._open_base()
+        if self.bloom is not None and total != len(first_seen):
+            self._rebuild_bloom()
+        return total - len(first_seen)
+
+    def _close_journal(self):
+        if self._journal is not None:
+            self.flush()
+            self._journal.close()
+            self._journal = None
+
+    def close(self):
+        self._close_journal()
+        self._close_base()
 
     def compute_hash(self, url: str, title: str) -> str:
-        normalized = f"{url.strip().lower()}|{title.strip().lower()}"
+        normalized = f"{canonical_url(url).lower()}|{title.strip().lower()}"
         return hashlib.sha256(normalized.encode()).hexdigest()[:16]
 
     def is_duplicate(self, url: str, title: str) -> bool:
         h = self.compute_hash(url, title)
-        return h in self.seen
+        return int(h, 16) in self
 
     def mark_seen(self, url: str, title: str):
-        h = self.compute_hash(url, title)
-        self.seen.add(h)
+        self.mark_hash(self.compute_hash(url, title))
+
+    def mark_hash(self, h: str, day=None):
+        """Mark a compute_hash() digest as seen (on `day`, default today) and journal it."""
+        value = int(h, 16)
+        if value in self:
+            return
+        day = today_number() if day is None else day
+        self._delta[value] = day
+        self._append(value, day)
+        if self.bloom is not None:
+            self.bloom.add(value)
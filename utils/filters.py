@@ -1,4 +1,6 @@
 import re
+from dataclasses import dataclass
+from functools import lru_cache
 from config.keywords import (
     ROLE_KEYWORDS,
     INTERNSHIP_PREFIXES_FR,
@@ -20,200 +22,296 @@ NON_STAGE_TYPES = [
     "contractor", "temporary", "interim", "vie",
 ]
 
+# Title markers showing the offer is NOT a stage ("poste" is allowed next to "stage"/"stagiaire")
+NON_STAGE_TITLE_MARKERS = [
+    "poste", "emploi", "recrutement", "embauche",
+    "cdi", "cdd", "full-time", "full time",
+    "temps plein", "permanent position",
+]
+
+# Include short codes like "ENG, GB", "SCT, GB" used by LinkedIn/Indeed
+UK_INDICATORS = ["united kingdom", "great britain", "england", "scotland",
+                 "wales", "ireland", "northern ireland",
+                 ", gb", ",gb", "eng,", "sct,", "wls,", "nir,"]
+UK_ACCEPTED = ["london", "canary wharf", "city of london", "dublin"]
+FRANCE_INDICATORS = ["france", "français", "francais"]
+PARIS_AREA = ["paris", "la defense", "la défense", "puteaux", "courbevoie",
+              "levallois", "neuilly", "issy", "boulogne", "ile-de-france",
+              "île-de-france", "idf", "92", "75"]
+SECONDARY_HUBS = ["zurich", "geneva", "luxembourg", "frankfurt"]
+MARKETS_DEPARTMENTS = ["global markets", "cib", "capital markets", "markets"]
+
+# Relevance bonus per location region bucket (see classify_location)
+REGION_BONUS = {"prime": 0.1, "hub": 0.08}
+# Distinct locations kept by the classify_location LRU cache
+LOCATION_CACHE_SIZE = 4096
+
+
+def _trie_pattern(node) -> str:
+    """Regex for a character trie, so keywords sharing a prefix share one branch."""
+    branches = [re.escape(ch) + _trie_pattern(child) for ch, child in sorted(node.items()) if ch]
+    if not branches:
+        return ""
+    if len(branches) == 1 and "" not in node:
+        return branches[0]
+    group = f"(?:{'|'.join(branches)})"
+    # A keyword ends here: the longer continuations are optional
+    return group + "?" if "" in node else group
+
+
+def compile_any(keywords):
+    """
+    Compile a keyword list into a single regex over lowercased text.
+    pattern.search(text) is true exactly when any(kw.lower() in text), but the
+    text is scanned once (through a prefix trie) instead of once per keyword.
+    """
+    trie = {}
+    for kw in keywords:
+        node = trie
+        for ch in kw.lower():
+            node = node.setdefault(ch, {})
+        node[""] = {}
+    if not trie or "" in trie:
+        return re.compile(r"(?!)" if not trie else "")  # empty list never matches, "" always does
+    return re.compile(_trie_pattern(trie))
+
+
+# Compiled once at import: each field is scanned in a single pass per list
+ROLE_RE = compile_any(ROLE_KEYWORDS)
+ROLE_KEYWORDS_LOWER = tuple(kw.lower() for kw in ROLE_KEYWORDS)  # per-keyword count in scoring
+INTERNSHIP_RE = compile_any(INTERNSHIP_PREFIXES_FR + INTERNSHIP_PREFIXES_EN)
+EXCLUDE_TITLE_RE = compile_any(EXCLUDE_KEYWORDS + EXCLUDE_TITLE_KEYWORDS)
+EXCLUDE_COMPANIES_RE = compile_any(EXCLUDE_COMPANIES)
+EXCLUDE_DURATION_RE = re.compile("|".join(f"(?:{p})" for p in EXCLUDE_DURATION_PATTERNS), re.IGNORECASE)
+DURATION_RES = [re.compile(p, re.IGNORECASE) for p in DURATION_PATTERNS]
+NON_STAGE_TYPES_RE = compile_any(NON_STAGE_TYPES)
+NON_STAGE_TITLE_RE = compile_any([m for m in NON_STAGE_TITLE_MARKERS if m != "poste"])
+EXCLUDE_LOCATIONS_RE = compile_any(EXCLUDE_LOCATIONS)
+ACCEPTED_LOCATIONS_RE = compile_any(ACCEPTED_LOCATIONS)
+EXCLUDE_UK_LOCATIONS_RE = compile_any(EXCLUDE_UK_LOCATIONS)
+UK_RE = compile_any(UK_INDICATORS)
+UK_ACCEPTED_RE = compile_any(UK_ACCEPTED)
+FRANCE_RE = compile_any(FRANCE_INDICATORS)
+PARIS_AREA_RE = compile_any(PARIS_AREA)
+SECONDARY_HUBS_RE = compile_any(SECONDARY_HUBS)
+MARKETS_DEPARTMENTS_RE = compile_any(MARKETS_DEPARTMENTS)
+
+
+@dataclass(frozen=True)
+class OfferText:
+    """
+    Lowercased view of an offer, built once per offer and shared by every
+    filter step instead of each step rebuilding and lowercasing its own strings.
+    """
+    title: str
+    text: str  # title + description snippet
+    text_with_type: str  # text + job type
+    job_type: str
+    location: str
+    company: str
+    department: str
+
+    @classmethod
+    def from_offer(cls, offer) -> "OfferText":
+        title = offer.title.lower()
+        text = f"{offer.title} {offer.description_snippet}".lower()
+        job_type = (offer.job_type or "").lower()
+        return cls(
+            title=title,
+            text=text,
+            text_with_type=f"{text} {job_type}",
+            job_type=job_type,
+            location=(offer.location or "").lower(),
+            company=(offer.company or "").lower(),
+            department=(offer.department or "").lower(),
+        )
+
+
+@dataclass(frozen=True)
+class LocationVerdict:
+    """Outcome of all location rules for one location string."""
+    status: str  # "accepted", "excluded" or "unknown" (no location / no known place)
+    excluded: bool  # secondary French city, or UK outside London/Dublin
+    accepted: bool  # not outside Paris area (France) / London-Dublin (UK)
+    region: str  # score bucket: "prime" (Paris/London), "hub" (SECONDARY_HUBS) or ""
+
+    @property
+    def bonus(self) -> float:
+        return REGION_BONUS.get(self.region, 0.0)
+
+
+def classify_location(location) -> LocationVerdict:
+    """
+    Classify a location once for both the filter and the score. Location
+    strings repeat massively across offers, so verdicts are memoized by
+    normalized (stripped, lowercased) location.
+    """
+    return _classify_normalized((location or "").strip().lower())
+
+
+@lru_cache(maxsize=LOCATION_CACHE_SIZE)
+def _classify_normalized(location) -> LocationVerdict:
+    # No location info: don't filter it out
+    if not location:
+        return LocationVerdict("unknown", excluded=False, accepted=True, region="")
+
+    is_uk = UK_RE.search(location) is not None
+    uk_accepted = UK_ACCEPTED_RE.search(location) is not None
+    paris_area = PARIS_AREA_RE.search(location) is not None
+
+    # Secondary French cities; UK locations must mention London or Dublin
+    excluded = (
+        (EXCLUDE_LOCATIONS_RE.search(location) is not None and not ACCEPTED_LOCATIONS_RE.search(location))
+        or ((is_uk or EXCLUDE_UK_LOCATIONS_RE.search(location) is not None) and not uk_accepted)
+    )
+
+    # France: only Paris area is OK; UK: only London and Dublin; unknown places are kept
+    if FRANCE_RE.search(location):
+        accepted = paris_area
+    elif is_uk:
+        accepted = uk_accepted
+    else:
+        accepted = True
+
+    # Paris or London get the highest bonus
+    if "paris" in location or "london" in location:
+        region = "prime"
+    elif SECONDARY_HUBS_RE.search(location):
+        region = "hub"
+    else:
+        region = ""
+
+    if excluded or not accepted:
+        status = "excluded"
+    elif region or paris_area or uk_accepted or ACCEPTED_LOCATIONS_RE.search(location):
+        status = "accepted"
+    else:
+        status = "unknown"
+    return LocationVerdict(status, excluded=excluded, accepted=accepted, region=region)
+
 
 class JobFilter:
-    def is_internship(self, offer) -> bool:
-        text = f"{offer.title} {offer.description_snippet} {offer.job_type or ''}".lower()
-        all_prefixes = INTERNSHIP_PREFIXES_FR + INTERNSHIP_PREFIXES_EN
-        return any(prefix in text for prefix in all_prefixes)
+    """
+    Every check accepts an optional pre-built OfferText; filter_and_score
+    builds it once per offer and threads it through all steps.
+    """
 
-    def matches_keywords(self, offer) -> bool:
-        text = f"{offer.title} {offer.description_snippet}".lower()
-        return any(kw.lower() in text for kw in ROLE_KEYWORDS)
+    def is_internship(self, offer, view=None) -> bool:
+        view = view or OfferText.from_offer(offer)
+        return INTERNSHIP_RE.search(view.text_with_type) is not None
 
-    def is_excluded(self, offer) -> bool:
-        title_lower = offer.title.lower()
-        text_lower = f"{offer.title} {offer.description_snippet}".lower()
+    def matches_keywords(self, offer, view=None) -> bool:
+        view = view or OfferText.from_offer(offer)
+        return ROLE_RE.search(view.text) is not None
 
-        # Exclude based on title keywords (M&A, PE, corporate, seniority, etc.)
-        if any(kw.lower() in title_lower for kw in EXCLUDE_KEYWORDS):
-            return True
+    def is_excluded(self, offer, view=None) -> bool:
+        view = view or OfferText.from_offer(offer)
 
-        # Exclude non-finance-de-marché title patterns
-        if any(kw.lower() in title_lower for kw in EXCLUDE_TITLE_KEYWORDS):
+        # Exclude based on title keywords (M&A, PE, corporate, seniority, non-finance-de-marché, etc.)
+        if EXCLUDE_TITLE_RE.search(view.title):
             return True
 
         # Exclude based on company name (retail, luxury, FMCG, consulting, etc.)
-        company_lower = (offer.company or "").lower()
-        if any(exc.lower() in company_lower for exc in EXCLUDE_COMPANIES):
+        if EXCLUDE_COMPANIES_RE.search(view.company):
             return True
 
         # Exclude bad durations (12 months, alternance, etc.)
-        for pattern in EXCLUDE_DURATION_PATTERNS:
-            if re.search(pattern, text_lower, re.IGNORECASE):
-                return True
-
-        return False
+        return EXCLUDE_DURATION_RE.search(view.text) is not None
 
-    def is_location_excluded(self, offer) -> bool:
+    def is_location_excluded(self, offer, view=None) -> bool:
         """Check if the offer is in an excluded location (secondary French cities + non-London/Dublin UK)."""
-        location_lower = (offer.location or "").lower()
-
-        # If no location info, don't exclude (let it through)
-        if not location_lower or location_lower.strip() == "":
-            return False
-
-        # Check if it's in a secondary French city
-        is_in_excluded_city = any(city in location_lower for city in EXCLUDE_LOCATIONS)
-        if is_in_excluded_city:
-            is_in_accepted = any(loc in location_lower for loc in ACCEPTED_LOCATIONS)
-            if not is_in_accepted:
-                return True
-
-        # Check UK locations - only London and Dublin are accepted
-        # Include short codes like "ENG, GB", "SCT, GB" used by LinkedIn/Indeed
-        uk_indicators = ["united kingdom", "great britain", "england", "scotland",
-                         "wales", "ireland", "northern ireland",
-                         ", gb", ",gb", "eng,", "sct,", "wls,", "nir,"]
-        is_uk = any(ind in location_lower for ind in uk_indicators)
-        is_in_excluded_uk = any(city in location_lower for city in EXCLUDE_UK_LOCATIONS)
-
-        if is_uk or is_in_excluded_uk:
-            # Must mention London or Dublin to be accepted
-            uk_accepted = ["london", "canary wharf", "city of london", "dublin"]
-            if not any(loc in location_lower for loc in uk_accepted):
-                return True
-
-        return False
-
-    def is_location_accepted(self, offer) -> bool:
-        """Check if the offer is in an accepted location."""
-        location_lower = (offer.location or "").lower()
-
-        # If no location, accept it (don't filter out unknowns)
-        if not location_lower or location_lower.strip() == "":
-            return True
-
-        # Check for France specifically - only Paris area is OK
-        france_indicators = ["france", "français", "francais"]
-        is_france = any(ind in location_lower for ind in france_indicators)
-
-        if is_france:
-            # Must also mention Paris area
-            paris_area = ["paris", "la defense", "la défense", "puteaux", "courbevoie",
-                          "levallois", "neuilly", "issy", "boulogne", "ile-de-france",
-                          "île-de-france", "idf", "92", "75"]
-            return any(loc in location_lower for loc in paris_area)
-
-        # Check for UK specifically - only London and Dublin are OK
-        uk_indicators = ["united kingdom", "great britain", "england",
-                         "scotland", "wales", "ireland",
-                         ", gb", ",gb", "eng,", "sct,", "wls,", "nir,"]
-        is_uk = any(ind in location_lower for ind in uk_indicators)
-
-        if is_uk:
-            uk_accepted = ["london", "canary wharf", "city of london", "dublin"]
-            return any(loc in location_lower for loc in uk_accepted)
-
-        # Check for accepted locations
-        if any(loc in location_lower for loc in ACCEPTED_LOCATIONS):
-            return True
+        return classify_location((view or OfferText.from_offer(offer)).location).excluded
 
-        # If location doesn't match any known pattern, keep it (don't over-filter)
-        return True
+    def is_location_accepted(self, offer, view=None) -> bool:
+        """Check if the offer is in an accepted location (unknown locations are accepted)."""
+        return classify_location((view or OfferText.from_offer(offer)).location).accepted
 
     def detect_duration(self, offer) -> str:
         text = f"{offer.description_snippet} {offer.duration or ''}"
-        for pattern in DURATION_PATTERNS:
-            match = re.search(pattern, text, re.IGNORECASE)
+        for pattern in DURATION_RES:
+            match = pattern.search(text)
             if match:
                 return match.group(0)
         return ""
 
-    def compute_relevance_score(self, offer) -> float:
+    def compute_relevance_score(self, offer, view=None, internship=None, duration=None) -> float:
+        """
+        `internship` and `duration` may be passed when the caller already
+        computed is_internship / detect_duration for this offer.
+        """
+        view = view or OfferText.from_offer(offer)
         score = 0.0
-        text = f"{offer.title} {offer.description_snippet}".lower()
-        title_lower = offer.title.lower()
 
         # Title keyword match (high weight)
-        for kw in ROLE_KEYWORDS:
-            if kw.lower() in title_lower:
-                score += 0.3
-                break
+        if ROLE_RE.search(view.title):
+            score += 0.3
 
         # Description keyword matches
-        kw_count = sum(1 for kw in ROLE_KEYWORDS if kw.lower() in text)
+        text = view.text
+        kw_count = sum(1 for kw in ROLE_KEYWORDS_LOWER if kw in text)
         score += min(kw_count * 0.05, 0.2)
 
         # Internship confirmation
-        if self.is_internship(offer):
+        if internship is None:
+            internship = self.is_internship(offer, view)
+        if internship:
             score += 0.2
 
         # Duration match
-        if self.detect_duration(offer):
+        if duration is None:
+            duration = self.detect_duration(offer)
+        if duration:
             score += 0.15
 
         # Location bonus - Paris or London get highest bonus
-        location_lower = (offer.location or "").lower()
-        if "paris" in location_lower or "london" in location_lower:
-            score += 0.1
-        elif any(loc in location_lower for loc in ["zurich", "geneva", "luxembourg", "frankfurt"]):
-            score += 0.08
+        score += classify_location(view.location).bonus
 
         # Department match
-        dept = (offer.department or "").lower()
-        if any(kw in dept for kw in ["global markets", "cib", "capital markets", "markets"]):
+        if MARKETS_DEPARTMENTS_RE.search(view.department):
             score += 0.05
 
         return min(round(score, 2), 1.0)
 
-    def is_non_stage(self, offer) -> bool:
+    def is_non_stage(self, offer, view=None) -> bool:
         """Reject offers that are clearly NOT stages (CDI, CDD, alternance, VIE, etc.)."""
-        job_type_lower = (offer.job_type or "").lower()
-        title_lower = offer.title.lower()
-        text_lower = f"{offer.title} {offer.description_snippet}".lower()
+        view = view or OfferText.from_offer(offer)
 
         # Check job_type field directly
-        for non_stage in NON_STAGE_TYPES:
-            if non_stage in job_type_lower:
-                return True
+        if NON_STAGE_TYPES_RE.search(view.job_type):
+            return True
 
         # Check if title explicitly says it's NOT a stage
-        non_stage_title_markers = [
-            "poste", "emploi", "recrutement", "embauche",
-            "cdi", "cdd", "full-time", "full time",
-            "temps plein", "permanent position",
-        ]
-        for marker in non_stage_title_markers:
-            if marker in title_lower:
-                # Exception: "poste de stage" or "poste stagiaire" is fine
-                if marker == "poste" and ("stage" in title_lower or "stagiaire" in title_lower):
-                    continue
-                return True
-
-        return False
+        title = view.title
+        if NON_STAGE_TITLE_RE.search(title):
+            return True
+        # Exception: "poste de stage" or "poste stagiaire" is fine
+        return "poste" in title and "stage" not in title and "stagiaire" not in title
 
     def filter_and_score(self, offers) -> list:
         results = []
         for offer in offers:
+            view = OfferText.from_offer(offer)
+
             # Step 0: Must be a stage (reject CDI, CDD, alternance, VIE, etc.)
-            if self.is_non_stage(offer):
+            if self.is_non_stage(offer, view):
                 continue
 
             # Step 1: Exclude by title/company/duration
-            if self.is_excluded(offer):
+            if self.is_excluded(offer, view):
                 continue
 
             # Step 2: Exclude by location (secondary French cities + UK filtering)
-            if self.is_location_excluded(offer):
+            if self.is_location_excluded(offer, view):
                 continue
 
             # Step 3: Must match internship OR role keywords
-            if not self.is_internship(offer) and not self.matches_keywords(offer):
+            internship = self.is_internship(offer, view)
+            if not internship and not self.matches_keywords(offer, view):
                 continue
 
-            offer.duration = self.detect_duration(offer) or offer.duration
-            offer.relevance_score = self.compute_relevance_score(offer)
+            duration = self.detect_duration(offer)
+            offer.duration = duration or offer.duration
+            offer.relevance_score = self.compute_relevance_score(offer, view, internship, duration)
             results.append(offer)
 
         results.sort(key=lambda x: x.relevance_score, reverse=True)
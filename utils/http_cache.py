@@ -0,0 +1,131 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from pathlib import Path
+
+CachedResponse = namedtuple(
+    "CachedResponse", ["status", "headers", "body", "etag", "last_modified", "stored_at"]
+)
+
+# Headers describing the wire encoding; the stored body is already decoded
+_DROPPED_HEADERS = {"content-encoding", "transfer-encoding", "content-length", "connection"}
+
+
+def storable_headers(headers) -> dict:
+    """Response headers worth persisting alongside a decoded body."""
+    return {k: v for k, v in headers.items() if k.lower() not in _DROPPED_HEADERS}
+
+
+class HttpCache:
+    """
+    Persistent HTTP response cache stored in SQLite.
+    Entries are keyed by method + URL + params + body. Callers use
+    conditional_headers() to revalidate stale entries with If-None-Match /
+    If-Modified-Since and refresh() when the server answers 304. The cache is
+    bounded by max_bytes, evicting least recently used entries first.
+    Safe to share between threads (one connection behind a lock).
+    """
+
+    def __init__(self, path="data/http_cache.sqlite", max_bytes=200 * 1024 * 1024):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                status INTEGER NOT NULL,
+                headers TEXT NOT NULL,
+                body BLOB NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                stored_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                size INTEGER NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses (accessed_at)")
+        self._size = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    @staticmethod
+    def make_key(method, url, params=None, json_body=None, data=None) -> str:
+        if isinstance(data, str):
+            data = data.encode()
+        payload = json.dumps(
+            [method.upper(), url, params, json_body, data.hex() if isinstance(data, bytes) else data],
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status, headers, body, etag, last_modified, stored_at FROM responses WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (time.time(), key))
+        status, headers, body, etag, last_modified, stored_at = row
+        return CachedResponse(status, json.loads(headers), body, etag, last_modified, stored_at)
+
+    @staticmethod
+    def is_fresh(entry, ttl) -> bool:
+        return bool(ttl) and time.time() - entry.stored_at < ttl
+
+    @staticmethod
+    def conditional_headers(entry) -> dict:
+        headers = {}
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    def refresh(self, key):
+        """Mark an entry as revalidated (server answered 304 Not Modified)."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE responses SET stored_at = ?, accessed_at = ? WHERE key = ?", (now, now, key)
+            )
+
+    def put(self, key, url, status, headers, body, ttl=0):
+        """Store a 200 response. Without validators it is only worth keeping if a TTL applies."""
+        etag = headers.get("ETag")
+        last_modified = headers.get("Last-Modified")
+        if status != 200 or not (etag or last_modified or ttl):
+            return
+        kept = storable_headers(headers)
+        now = time.time()
+        with self._lock:
+            old = self._conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, url, status, json.dumps(kept), body, etag, last_modified, now, now, len(body)),
+            )
+            self._size += len(body) - (old[0] if old else 0)
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """Drop least recently used entries until the cache is back under 90% of max_bytes."""
+        target = self.max_bytes * 0.9
+        doomed = []
+        for key, size in self._conn.execute("SELECT key, size FROM responses ORDER BY accessed_at"):
+            if self._size <= target:
+                break
+            doomed.append((key,))
+            self._size -= size
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", doomed)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -1,9 +1,12 @@
 import requests
 from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
 from urllib3.util.retry import Retry
-import time
 import random
 import logging
+from utils.http_cache import HttpCache
+from utils.rate_limiter import HostRateLimiter, host_of, parse_retry_after
 
 logger = logging.getLogger(__name__)
 
@@ -16,38 +19,141 @@ USER_AGENTS = [
 ]
 
 
+RETRY_STATUSES = [500, 502, 503, 504]
+BACKOFF_FACTOR = 0.5  # seconds before the first retry, doubled at each attempt
+
+
+# Request policy shared by HttpClient and AsyncHttpClient (utils/async_http_client.py)
+
+def request_key(method, url, kwargs) -> str:
+    """Cache and recorder key of a request made with `kwargs` (params, json, data)."""
+    return HttpCache.make_key(method, url, kwargs.get("params"), kwargs.get("json"), kwargs.get("data"))
+
+
+def request_headers(headers) -> dict:
+    """Copy of the caller's headers with a random User-Agent and the default Accept-Language."""
+    headers = dict(headers or {})
+    headers.setdefault("User-Agent", random.choice(USER_AGENTS))
+    headers.setdefault("Accept-Language", "en-US,en;q=0.9,fr;q=0.8")
+    return headers
+
+
+def backoff(attempt) -> float:
+    return BACKOFF_FACTOR * (2 ** attempt)
+
+
+def retry_delay(resp, attempt, max_retry_after):
+    """Seconds to back off after a 429, or None if the server asks for too long a pause."""
+    delay = parse_retry_after(resp.headers.get("Retry-After"))
+    if delay is None:
+        delay = backoff(attempt)
+    return delay if delay <= max_retry_after else None
+
+
+def cache_lookup(cache, key, ttl, headers):
+    """
+    (entry, fresh) of `key` in `cache`: a fresh entry is served as is, a
+    stale one adds its validators to `headers` for a conditional request.
+    """
+    entry = cache.get(key)
+    if entry is None:
+        return None, False
+    if HttpCache.is_fresh(entry, ttl):
+        return entry, True
+    headers.update(HttpCache.conditional_headers(entry))
+    return entry, False
+
+
+def cache_store(cache, key, url, resp, entry, ttl) -> bool:
+    """Store `resp` in `cache`; True if it is a 304 confirming `entry`, to be served instead."""
+    if resp.status_code == 304 and entry is not None:
+        cache.refresh(key)
+        return True
+    cache.put(key, url, resp.status_code, resp.headers, resp.content, ttl)
+    return False
+
+
 class HttpClient:
-    def __init__(self, min_delay=1.0, max_delay=3.0, max_retries=3, timeout=30):
+    def __init__(self, min_delay=1.0, max_delay=3.0, max_retries=3, timeout=30, pool_size=10,
+                 burst=1, max_retry_after=120, cache=None, cache_ttl=0, recorder=None):
         self.session = requests.Session()
+        # 429s are handled below so Retry-After pauses the whole host, not just this call
         retry = Retry(
             total=max_retries,
-            backoff_factor=0.5,
-            status_forcelist=[429, 500, 502, 503, 504],
+            backoff_factor=BACKOFF_FACTOR,
+            status_forcelist=RETRY_STATUSES,
         )
-        self.session.mount("https://", HTTPAdapter(max_retries=retry))
-        self.session.mount("http://", HTTPAdapter(max_retries=retry))
-        self.min_delay = min_delay
-        self.max_delay = max_delay
+        # One connection pool per host; keep enough of them alive for parallel scrapers
+        adapter = HTTPAdapter(max_retries=retry, pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.rate_limiter = HostRateLimiter(min_delay=min_delay, max_delay=max_delay, burst=burst)
+        self.max_retries = max_retries
+        self.max_retry_after = max_retry_after
         self.timeout = timeout
+        self.cache = cache  # optional HttpCache
+        self.cache_ttl = cache_ttl  # default TTL when callers don't pass one
+        self.recorder = recorder  # optional HttpRecorder (record/replay mode)
+
+    def request(self, method, url, cache_ttl=None, **kwargs):
+        key = request_key(method, url, kwargs)
+        if self.recorder is not None and self.recorder.replaying:
+            # Offline: no network, no politeness delay
+            status, headers, body = self.recorder.replay(key, method, url)
+            return self._build_response(status, headers, body, url)
+
+        headers = request_headers(kwargs.pop("headers", None))
+        timeout = kwargs.pop("timeout", self.timeout)
+
+        resp = self._fetch(method, url, key, cache_ttl, headers, timeout, **kwargs)
+        if self.recorder is not None:
+            self.recorder.record(key, method, url, resp.status_code, resp.headers, resp.content)
+        return resp
 
-    def _delay(self):
-        time.sleep(random.uniform(self.min_delay, self.max_delay))
+    def _fetch(self, method, url, key, cache_ttl, headers, timeout, **kwargs):
+        if self.cache is None:
+            return self._send(method, url, headers, timeout, **kwargs)
 
-    def _random_ua(self):
-        return random.choice(USER_AGENTS)
+        ttl = self.cache_ttl if cache_ttl is None else cache_ttl
+        entry, fresh = cache_lookup(self.cache, key, ttl, headers)
+        if fresh:
+            return self._cached_response(entry, url)
+
+        resp = self._send(method, url, headers, timeout, **kwargs)
+        if cache_store(self.cache, key, url, resp, entry, ttl):
+            return self._cached_response(entry, url)
+        return resp
+
+    def _send(self, method, url, headers, timeout, **kwargs):
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.wait(url)
+            resp = self.session.request(method, url, headers=headers, timeout=timeout, **kwargs)
+            if resp.status_code != 429 or attempt == self.max_retries:
+                return resp
+            delay = retry_delay(resp, attempt, self.max_retry_after)
+            if delay is None:
+                return resp
+            logger.info(f"429 from {host_of(url)}, pausing host for {delay:.1f}s")
+            self.rate_limiter.block(url, delay)
+        return resp
+
+    @staticmethod
+    def _build_response(status, headers, body, url):
+        resp = requests.Response()
+        resp.status_code = status
+        resp._content = body
+        resp.headers = CaseInsensitiveDict(headers)
+        resp.encoding = get_encoding_from_headers(resp.headers)
+        resp.url = url
+        return resp
+
+    def _cached_response(self, entry, url):
+        resp = self._build_response(entry.status, entry.headers, entry.body, url)
+        resp.from_cache = True
+        return resp
 
     def get(self, url, **kwargs):
-        self._delay()
-        headers = kwargs.pop("headers", {})
-        headers.setdefault("User-Agent", self._random_ua())
-        headers.setdefault("Accept-Language", "en-US,en;q=0.9,fr;q=0.8")
-        timeout = kwargs.pop("timeout", self.timeout)
-        return self.session.get(url, headers=headers, timeout=timeout, **kwargs)
+        return self.request("GET", url, **kwargs)
 
     def post(self, url, **kwargs):
-        self._delay()
-        headers = kwargs.pop("headers", {})
-        headers.setdefault("User-Agent", self._random_ua())
-        headers.setdefault("Accept-Language", "en-US,en;q=0.9,fr;q=0.8")
-        timeout = kwargs.pop("timeout", self.timeout)
-        return self.session.post(url, headers=headers, timeout=timeout, **kwargs)
+        return self.request("POST", url, **kwargs)
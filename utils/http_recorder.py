@@ -0,0 +1,97 @@
+import base64
+import gzip
+import json
+import threading
+from collections import defaultdict
+
+from utils.http_cache import HttpCache, storable_headers
+
+
+class ReplayMiss(ConnectionError):
+    """Raised in replay mode when the archive holds no response for a request."""
+
+
+class HttpRecorder:
+    """
+    Record/replay archive for offline runs of the whole pipeline.
+
+    In "record" mode every HTTP exchange made through HttpClient/AsyncHttpClient
+    (and every jobspy call, see record_call) is appended to a gzip-compressed
+    JSON-lines archive. In "replay" mode the archive is loaded and served back
+    with no network access and no politeness delay. Identical requests are
+    answered in the order they were recorded; the last answer is repeated.
+    """
+
+    def __init__(self, path, mode):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown recorder mode '{mode}'")
+        self.path = path
+        self.mode = mode
+        self._lock = threading.Lock()
+        self._entries = defaultdict(list)
+        self._served = defaultdict(int)
+        self._file = None
+        if self.replaying:
+            self._load()
+        else:
+            self._file = gzip.open(path, "wt", encoding="utf-8")
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == "record"
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    make_key = staticmethod(HttpCache.make_key)
+
+    def _load(self):
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            for line in f:
+                entry = json.loads(line)
+                self._entries[entry["key"]].append(entry)
+
+    def _write(self, entry):
+        with self._lock:
+            self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def _next(self, key, description):
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                raise ReplayMiss(f"No recorded response for {description}")
+            index = min(self._served[key], len(entries) - 1)
+            self._served[key] += 1
+            return entries[index]
+
+    def record(self, key, method, url, status, headers, body: bytes):
+        self._write({
+            "kind": "http",
+            "key": key,
+            "method": method,
+            "url": url,
+            "status": status,
+            "headers": storable_headers(headers),
+            "body": base64.b64encode(body).decode("ascii"),
+        })
+
+    def replay(self, key, method, url):
+        """Return (status, headers, body) recorded for this request."""
+        entry = self._next(key, f"{method} {url}")
+        return entry["status"], entry["headers"], base64.b64decode(entry["body"])
+
+    def record_call(self, name, params, result):
+        """Record the JSON-serialisable result of a non-HTTP call (e.g. jobspy.scrape_jobs)."""
+        key = self.make_key("CALL", name, params)
+        self._write({"kind": "call", "key": key, "name": name, "result": result})
+
+    def replay_call(self, name, params):
+        key = self.make_key("CALL", name, params)
+        return self._next(key, f"{name}({params})")["result"]
+
+    def close(self):
+        if self._file is not None:
+            with self._lock:
+                self._file.close()
+                self._file = None
@@ -0,0 +1,306 @@
+"""
+Cross-source near-duplicate detection.
+
+The same internship often arrives from the company's own careers site and
+from LinkedIn/Indeed/Glassdoor under different URLs and slightly different
+titles ("... (H/F)", "- Mars", "M/W/D"). Titles are normalized and
+shingled, MinHash signatures are bucketed by LSH bands keyed on the
+normalized company, and candidates from the same bucket are confirmed by
+exact Jaccard similarity of their shingles, so a lookup only touches a
+handful of offers however large the history grows.
+
+Only copies from different sources, one of them an aggregator, are
+linked: two postings of one source are distinct postings. Years and
+other numbers stay in the normalized title and must be the same in both
+copies ("semestre 2026" is not the "semestre 2027" intake).
+"""
+
+import hashlib
+import logging
+import re
+import sqlite3
+import unicodedata
+from pathlib import Path
+
+import numpy as np
+
+from utils.dedup import today_number
+
+logger = logging.getLogger(__name__)
+
+# Words dropped from company names before comparing them
+COMPANY_STOPWORDS = {
+    "sa", "sas", "se", "plc", "inc", "ltd", "llc", "limited", "group", "groupe",
+    "ag", "gmbh", "nv", "bv", "co", "corp", "corporation", "the", "and", "company", "lp", "llp",
+}
+_MONTHS = (
+    "janvier fevrier mars avril mai juin juillet aout septembre octobre novembre decembre "
+    "january february march april may june july august september october november december "
+    "jan feb mar apr jun jul aug sep sept oct nov dec"
+)
+# Title noise that differs between copies of one posting (longest alternatives first).
+# Years, reference codes and other numbers are kept: they tell intakes apart.
+_TITLE_NOISE = re.compile(
+    r"\b(?:m/w/d|m/f/d|f/m/d|w/m/d|h/f/x|f/h/x|m/f/x|f/m/x|h/f|f/h|m/f|f/m|m/w|w/m|all genders"
+    r"|intake|open|" + "|".join(_MONTHS.split()) + r")\b"
+)
+_WORD = re.compile(r"[a-z0-9]+")
+_NUMBER = re.compile(r"\d+")
+
+_PRIME = (1 << 31) - 1  # products of two values below 2**31 fit in uint64
+_SHINGLE = 4
+
+
+def _fold(text: str) -> str:
+    """Lowercase and strip accents."""
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).lower()
+
+
+def normalize_company(name: str) -> str:
+    return " ".join(w for w in _WORD.findall(_fold(name)) if w not in COMPANY_STOPWORDS)
+
+
+def normalize_title(title: str) -> str:
+    return " ".join(_WORD.findall(_TITLE_NOISE.sub(" ", _fold(title))))
+
+
+def shingles(normalized_title: str) -> set:
+    text = normalized_title
+    if len(text) <= _SHINGLE:
+        return {text} if text else set()
+    return {text[i:i + _SHINGLE] for i in range(len(text) - _SHINGLE + 1)}
+
+
+def numbers(normalized_title: str) -> set:
+    """Numbers of a title (year, semester, reference): copies of one posting share them all."""
+    return set(_NUMBER.findall(normalized_title))
+
+
+def jaccard(a: set, b: set) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def _hash64(text: str) -> int:
+    return int.from_bytes(hashlib.blake2b(text.encode(), digest_size=8).digest(), "little")
+
+
+def _city(location: str) -> set:
+    """Words of the first part of a location ("Paris, Île-de-France" -> {"paris"})."""
+    return {w for w in _WORD.findall(_fold(location).split(",")[0]) if len(w) > 2}
+
+
+def locations_compatible(a: str, b: str) -> bool:
+    """Unknown locations match anything; otherwise the city parts must share a word."""
+    city_a, city_b = _city(a), _city(b)
+    if not city_a or not city_b:
+        return True
+    return bool(city_a & set(_WORD.findall(_fold(b))) or city_b & set(_WORD.findall(_fold(a))))
+
+
+class MinHasher:
+    """MinHash signatures over shingle sets, `bands` LSH bands of `num_perm // bands` rows."""
+
+    def __init__(self, num_perm=64, bands=16, seed=1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self._a = rng.integers(1, _PRIME, num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, _PRIME, num_perm, dtype=np.uint64)
+
+    def signature(self, shingle_set) -> np.ndarray:
+        if not shingle_set:
+            return np.full(self.num_perm, _PRIME, dtype=np.uint64)
+        values = np.fromiter((_hash64(s) % _PRIME for s in shingle_set), dtype=np.uint64)
+        return ((np.outer(self._a, values) + self._b[:, None]) % _PRIME).min(axis=1)
+
+    def band_keys(self, company: str, signature: np.ndarray) -> list:
+        """One bucket key per band, scoped to the company (signed 64-bit, for SQLite)."""
+        keys = []
+        for band in range(self.bands):
+            chunk = signature[band * self.rows:(band + 1) * self.rows].tobytes()
+            digest = hashlib.blake2b(f"{company}|{band}|".encode() + chunk, digest_size=8).digest()
+            keys.append(int.from_bytes(digest, "little", signed=True))
+        return keys
+
+
+class NearDuplicateIndex:
+    """
+    Persistent LSH index of saved offers (SQLite, derived data: rebuilt from
+    the CSVs when missing). collapse() groups near-duplicate offers of a run,
+    keeps one copy per group (primary source first, then highest score) and
+    drops copies of offers saved by earlier runs, recording every dropped
+    URL as a link to the kept offer. Copies must come from different
+    sources, at least one of them in `aggregator_sources`.
+    """
+
+    def __init__(self, path="data/near_dup_index.sqlite", threshold=0.85, aggregator_sources=(),
+                 ttl_days=None, num_perm=64, bands=16):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.threshold = threshold
+        self.aggregator_sources = set(aggregator_sources)
+        self.ttl_days = ttl_days
+        self.hasher = MinHasher(num_perm, bands)
+        self._conn = sqlite3.connect(str(self.path))
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(offers)")}
+        if columns and "source" not in columns:
+            # Index built before offers kept their source: rebuilt from the CSVs (links are kept)
+            self._conn.executescript("DROP TABLE offers; DROP TABLE IF EXISTS bands;")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS offers (
+                id TEXT PRIMARY KEY,
+                company TEXT NOT NULL,
+                location TEXT NOT NULL,
+                title TEXT NOT NULL,
+                url TEXT NOT NULL,
+                source TEXT NOT NULL,
+                day INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_offers_day ON offers (day);
+            CREATE TABLE IF NOT EXISTS bands (key INTEGER NOT NULL, id TEXT NOT NULL);
+            CREATE INDEX IF NOT EXISTS idx_bands_key ON bands (key);
+            CREATE TABLE IF NOT EXISTS links (
+                id TEXT NOT NULL,
+                url TEXT NOT NULL,
+                PRIMARY KEY (id, url)
+            );
+            """
+        )
+        if ttl_days:
+            self.prune(today_number() - ttl_days)
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM offers").fetchone()[0]
+
+    def _features(self, company, title):
+        company_key = normalize_company(company)
+        title_key = normalize_title(title)
+        shingle_set = shingles(title_key)
+        keys = self.hasher.band_keys(company_key, self.hasher.signature(shingle_set))
+        return company_key, title_key, shingle_set, keys
+
+    def _linkable(self, source, candidate_source) -> bool:
+        """Copies of one posting come from different sources, at least one an aggregator."""
+        return source != candidate_source and bool({source, candidate_source} & self.aggregator_sources)
+
+    def _matches(self, title_key, shingle_set, location, candidate_title, candidate_location) -> bool:
+        return (
+            numbers(title_key) == numbers(candidate_title)
+            and jaccard(shingle_set, shingles(candidate_title)) >= self.threshold
+            and locations_compatible(location, candidate_location)
+        )
+
+    def find(self, company, title, location, source):
+        """Id of a saved offer that `title` at `company` from `source` duplicates, or None."""
+        _, title_key, shingle_set, keys = self._features(company, title)
+        return self._find(title_key, shingle_set, location, source, keys)
+
+    def _find(self, title_key, shingle_set, location, source, keys):
+        placeholders = ",".join("?" * len(keys))
+        rows = self._conn.execute(
+            f"SELECT DISTINCT o.id, o.title, o.location, o.source FROM bands b JOIN offers o ON o.id = b.id "
+            f"WHERE b.key IN ({placeholders})",
+            keys,
+        ).fetchall()
+        for offer_id, title, candidate_location, candidate_source in rows:
+            if self._linkable(source, candidate_source) and self._matches(
+                title_key, shingle_set, location, title, candidate_location
+            ):
+                return offer_id
+        return None
+
+    def add(self, offer_id, company, title, location, url, source, day=None):
+        company_key, _, _, keys = self._features(company, title)
+        inserted = self._conn.execute(
+            "INSERT OR IGNORE INTO offers VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (offer_id, company_key, location or "", normalize_title(title), url, source or "",
+             today_number() if day is None else day),
+        ).rowcount
+        if inserted:
+            self._conn.executemany("INSERT INTO bands VALUES (?, ?)", [(key, offer_id) for key in keys])
+
+    def link(self, offer_id, url):
+        self._conn.execute("INSERT OR IGNORE INTO links VALUES (?, ?)", (offer_id, url))
+
+    def links(self, offer_id) -> list:
+        return [url for (url,) in self._conn.execute("SELECT url FROM links WHERE id = ?", (offer_id,))]
+
+    def prune(self, before_day):
+        """Forget offers saved before `before_day` (same window as the dedup TTL)."""
+        with self._conn:
+            self._conn.execute(
+                "DELETE FROM bands WHERE id IN (SELECT id FROM offers WHERE day < ?)", (before_day,)
+            )
+            self._conn.execute(
+                "DELETE FROM links WHERE id IN (SELECT id FROM offers WHERE day < ?)", (before_day,)
+            )
+            self._conn.execute("DELETE FROM offers WHERE day < ?", (before_day,))
+
+    def collapse(self, candidates):
+        """
+        `candidates`: [(offer_id, offer)] of offers about to be saved. Returns
+        (kept, dropped): kept is [(offer_id, offer, duplicate_urls)] in input
+        order, dropped is [(offer_id, offer, kept_or_saved_id)].
+        """
+        features = [self._features(o.company, o.title) for _, o in candidates]
+        # Primary sources first, then highest score: the first copy of a group is kept
+        order = sorted(
+            range(len(candidates)),
+            key=lambda i: (candidates[i][1].source in self.aggregator_sources,
+                           -candidates[i][1].relevance_score, i),
+        )
+        buckets = {}  # band key -> indexes of offers kept in this run
+        duplicates = {}  # kept index -> [urls]
+        dropped = []
+        for i in order:
+            offer_id, offer = candidates[i]
+            _, title_key, shingle_set, keys = features[i]
+
+            winner = None
+            for j in dict.fromkeys(j for key in keys for j in buckets.get(key, ())):
+                if self._linkable(offer.source, candidates[j][1].source) and self._matches(
+                    title_key, shingle_set, offer.location, normalize_title(candidates[j][1].title),
+                    candidates[j][1].location,
+                ):
+                    winner = j
+                    break
+            if winner is not None:
+                duplicates[winner].append(offer.url)
+                dropped.append((offer_id, offer, candidates[winner][0]))
+                continue
+
+            saved_id = self._find(title_key, shingle_set, offer.location, offer.source, keys)
+            if saved_id is not None:
+                dropped.append((offer_id, offer, saved_id))
+                continue
+
+            duplicates[i] = []
+            for key in keys:
+                buckets.setdefault(key, []).append(i)
+
+        kept = [(candidates[i][0], candidates[i][1], duplicates[i]) for i in sorted(duplicates)]
+        if dropped:
+            logger.info(f"{len(dropped)} near-duplicate offer(s) linked to another copy instead of saved")
+        return kept, dropped
+
+    def rebuild(self, rows):
+        """Fill the index from stored offers: rows of (offer_id, company, title, location, url, source, day)."""
+        cutoff = today_number() - self.ttl_days if self.ttl_days else None
+        for offer_id, company, title, location, url, source, day in rows:
+            if cutoff is None or day >= cutoff:
+                self.add(offer_id, company, title, location, url, source, day)
+        self.commit()
+
+    def commit(self):
+        self._conn.commit()
+
+    def close(self):
+        self._conn.commit()
+        self._conn.close()
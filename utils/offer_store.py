@@ -0,0 +1,449 @@
+"""
+Single indexed store of every saved offer (SQLite), so questions over the
+whole history ("all Paris structuring offers since March") are one query
+instead of a pass over every dated CSV.
+
+Each offer remembers the daily file it belongs to: the dated CSVs are
+export views of the store, written by export_csv(). CSVs created or edited
+outside the store (older runs, `rescore`) are picked up by sync(). Rows are
+keyed by (id, file): an offer saved again once its hash expired from the
+dedup store (DEDUP_TTL_DAYS) keeps both occurrences.
+
+An FTS5 index over title, snippet, company and location is kept in step
+with the offers table by triggers, for search().
+
+The `liveness` table tracks which offers are still listed: each run's
+filtered offers are diffed against the offers open after the previous
+run (update_liveness()). It is keyed by offer id, describes the latest
+occurrence of each offer and is never rewritten by CSV imports.
+
+The `query_stats` table accumulates, per company and search query, how
+many runs used the query, the requests it cost and the new offers it
+found, for the QueryPlanner (utils/query_planner.py). The `postings_read`
+table remembers the raw posting ids each company's result pages listed
+(utils/posting_log.py).
+"""
+
+import csv
+import hashlib
+import os
+import re
+import sqlite3
+from collections import namedtuple
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from utils.filters import classify_location
+
+COLUMNS = [
+    "id", "title", "company", "location", "url", "date_posted",
+    "date_scraped", "description_snippet", "source", "job_type",
+    "duration", "department", "relevance_score", "status",
+    "duplicate_urls", "search_query",
+]
+INDEXED_COLUMNS = ["company", "source", "date_scraped", "relevance_score"]
+# Every other column is stored as text, exactly as written to the CSV
+COLUMN_TYPES = {"relevance_score": "REAL"}
+SEARCH_COLUMNS = ["title", "description_snippet", "company", "location"]
+SEARCH_WEIGHTS = [4.0, 1.0, 2.0, 1.0]  # bm25 weight of each search column
+# Columns search() reads from the liveness table when the offer is tracked there
+LIVE_COLUMNS = {"status": "COALESCE(l.status, o.status)"}
+RunDiff = namedtuple("RunDiff", ["appeared", "still_open", "closed"])
+
+_WORD = re.compile(r"\w")
+SORT_ORDERS = {
+    "match": "match_rank, o.relevance_score DESC",
+    "score": "o.relevance_score DESC, o.date_scraped DESC",
+    "date": "o.date_scraped DESC, o.relevance_score DESC",
+}
+
+
+def _digest(path) -> str:
+    return hashlib.blake2b(Path(path).read_bytes(), digest_size=16).hexdigest()
+
+
+def _score(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _cell(value) -> str:
+    return "" if value is None else str(value)
+
+
+def _phrases(text, column=None) -> str:
+    """FTS5 expression matching every word of `text` (quoted, so punctuation is not syntax)."""
+    prefix = f"{column} : " if column else ""
+    words = [word for word in (text or "").split() if _WORD.search(word)]
+    return " ".join(prefix + '"' + word.replace('"', '""') + '"' for word in words)
+
+
+def _location_status(location) -> str:
+    return classify_location(location).status
+
+
+def _location_region(location) -> str:
+    return classify_location(location).region
+
+
+class OfferStore:
+    """
+    Offers keyed by id, with the name of their daily file. The `files`
+    table holds the digest of each file as last exported or imported
+    (NULL while the store has rows the file does not have yet).
+    """
+
+    def __init__(self, path="data/offers.sqlite"):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path))
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # INSERT OR REPLACE must fire the delete trigger that keeps the search index in step
+        self._conn.execute("PRAGMA recursive_triggers=ON")
+        self._conn.create_function("location_status", 1, _location_status, deterministic=True)
+        self._conn.create_function("location_region", 1, _location_region, deterministic=True)
+        has_search_index = self._conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'offers_fts'"
+        ).fetchone()
+        keyed_by_id = self._conn.execute(
+            "SELECT 1 FROM pragma_table_info('offers') WHERE name = 'file' AND pk = 0"
+        ).fetchone()
+        if keyed_by_id:
+            # Store keyed by id alone: move its rows aside and recreate the table keyed by (id, file)
+            self._conn.executescript(
+                "DROP TRIGGER IF EXISTS offers_fts_insert; DROP TRIGGER IF EXISTS offers_fts_delete;"
+                "DROP TRIGGER IF EXISTS offers_fts_update; DROP TABLE IF EXISTS offers_fts;"
+                + "".join(f"DROP INDEX IF EXISTS idx_offers_{name};" for name in ["file", *INDEXED_COLUMNS])
+                + "ALTER TABLE offers RENAME TO offers_by_id;"
+            )
+            has_search_index = None
+        columns = ", ".join(f"{name} {COLUMN_TYPES.get(name, 'TEXT')}" for name in COLUMNS[1:])
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS offers (
+                id TEXT NOT NULL,
+                {columns},
+                file TEXT NOT NULL,
+                PRIMARY KEY (id, file)
+            );
+            CREATE INDEX IF NOT EXISTS idx_offers_file ON offers (file);
+            CREATE TABLE IF NOT EXISTS files (name TEXT PRIMARY KEY, digest TEXT);
+            CREATE TABLE IF NOT EXISTS liveness (
+                id TEXT PRIMARY KEY,
+                company TEXT NOT NULL,
+                source TEXT NOT NULL,
+                title TEXT NOT NULL,
+                url TEXT NOT NULL,
+                status TEXT NOT NULL,
+                first_seen TEXT NOT NULL,
+                last_seen TEXT NOT NULL,
+                closed_at TEXT,
+                search_query TEXT NOT NULL DEFAULT ''
+            );
+            CREATE INDEX IF NOT EXISTS idx_liveness_status ON liveness (status);
+            CREATE TABLE IF NOT EXISTS query_stats (
+                company TEXT NOT NULL,
+                platform TEXT NOT NULL,
+                query TEXT NOT NULL,
+                runs INTEGER NOT NULL,
+                requests INTEGER NOT NULL,
+                new_offers INTEGER NOT NULL,
+                last_run TEXT NOT NULL,
+                PRIMARY KEY (company, query)
+            );
+            CREATE TABLE IF NOT EXISTS postings_read (
+                company TEXT NOT NULL,
+                posting TEXT NOT NULL,
+                last_read TEXT NOT NULL,
+                PRIMARY KEY (company, posting)
+            );
+            CREATE VIRTUAL TABLE IF NOT EXISTS offers_fts USING fts5 (
+                {search_columns}, content = 'offers', content_rowid = 'rowid',
+                tokenize = 'unicode61 remove_diacritics 2'
+            );
+            CREATE TRIGGER IF NOT EXISTS offers_fts_insert AFTER INSERT ON offers BEGIN
+                INSERT INTO offers_fts (rowid, {search_columns}) VALUES (new.rowid, {new_values});
+            END;
+            CREATE TRIGGER IF NOT EXISTS offers_fts_delete AFTER DELETE ON offers BEGIN
+                INSERT INTO offers_fts (offers_fts, rowid, {search_columns})
+                VALUES ('delete', old.rowid, {old_values});
+            END;
+            CREATE TRIGGER IF NOT EXISTS offers_fts_update AFTER UPDATE ON offers BEGIN
+                INSERT INTO offers_fts (offers_fts, rowid, {search_columns})
+                VALUES ('delete', old.rowid, {old_values});
+                INSERT INTO offers_fts (rowid, {search_columns}) VALUES (new.rowid, {new_values});
+            END;
+            """.format(
+                columns=columns,
+                search_columns=", ".join(SEARCH_COLUMNS),
+                new_values=", ".join(f"new.{name}" for name in SEARCH_COLUMNS),
+                old_values=", ".join(f"old.{name}" for name in SEARCH_COLUMNS),
+            )
+            + "".join(
+                f"CREATE INDEX IF NOT EXISTS idx_offers_{name} ON offers ({name});\n"
+                for name in INDEXED_COLUMNS
+            )
+        )
+        # Stores created before a column was added: add it (existing rows read as "")
+        self._add_columns("offers", {name: COLUMN_TYPES.get(name, "TEXT") for name in COLUMNS[1:]})
+        self._add_columns("liveness", {"search_query": "TEXT NOT NULL DEFAULT ''"})
+        if keyed_by_id:
+            old_columns = [row[1] for row in self._conn.execute("PRAGMA table_info(offers_by_id)")]
+            copied = ", ".join(name for name in old_columns if name in COLUMNS or name == "file")
+            with self._conn:
+                self._conn.execute(f"INSERT INTO offers ({copied}) SELECT {copied} FROM offers_by_id")
+                self._conn.execute("DROP TABLE offers_by_id")
+        if not has_search_index:
+            # Store created before the search index: index the offers it already holds
+            with self._conn:
+                self._conn.execute("INSERT INTO offers_fts (offers_fts) VALUES ('rebuild')")
+
+    def _add_columns(self, table, columns):
+        existing = {row[1] for row in self._conn.execute(f"PRAGMA table_info({table})")}
+        with self._conn:
+            for name, definition in columns.items():
+                if name not in existing:
+                    self._conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {definition}")
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM offers").fetchone()[0]
+
+    def _insert(self, rows, file):
+        self._conn.executemany(
+            f"INSERT OR REPLACE INTO offers ({', '.join(COLUMNS)}, file) "
+            f"VALUES ({', '.join('?' * (len(COLUMNS) + 1))})",
+            (
+                [_score(row.get(name)) if name in COLUMN_TYPES else _cell(row.get(name)) for name in COLUMNS]
+                + [file]
+                for row in rows
+            ),
+        )
+
+    def add(self, rows, file):
+        """Insert row dicts (CSVManager.COLUMNS) into daily file `file` in one transaction."""
+        with self._conn:
+            self._insert(rows, file)
+            self._conn.execute(
+                "INSERT INTO files VALUES (?, NULL) ON CONFLICT (name) DO UPDATE SET digest = NULL",
+                (file,),
+            )
+
+    def import_csv(self, path) -> int:
+        """Replace the rows of the daily file at `path` with its content. Returns the row count."""
+        path = Path(path)
+        with open(path, newline="", encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+        with self._conn:
+            self._conn.execute("DELETE FROM offers WHERE file = ?", (path.name,))
+            self._insert(rows, path.name)
+            self._conn.execute("INSERT OR REPLACE INTO files VALUES (?, ?)", (path.name, _digest(path)))
+        return len(rows)
+
+    def export_csv(self, file, path):
+        """Write the rows of daily file `file` to `path` (fsync'd) and record its digest."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        cursor = self._conn.execute(
+            f"SELECT {', '.join(COLUMNS)} FROM offers WHERE file = ? ORDER BY rowid", (file,)
+        )
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f, lineterminator="\n")
+            writer.writerow(COLUMNS)
+            writer.writerows(tuple(map(_cell, row)) for row in cursor)
+            f.flush()
+            os.fsync(f.fileno())
+        with self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO files VALUES (?, ?)", (file, _digest(path)))
+
+    def sync(self, csv_dir) -> dict:
+        """
+        Bring the store and the CSVs of `csv_dir` in line: export files the
+        store has unwritten rows for (interrupted run), then import CSVs that
+        are new or changed since the store last wrote or read them.
+        """
+        csv_dir = Path(csv_dir)
+        known = dict(self._conn.execute("SELECT name, digest FROM files"))
+        summary = {"exported": 0, "imported": 0, "rows": 0}
+        unwritten = [name for name, digest in known.items() if digest is None]
+        for name in unwritten:
+            self.export_csv(name, csv_dir / name)
+            summary["exported"] += 1
+        for path in sorted(csv_dir.glob("internships*.csv")):
+            if path.name not in unwritten and known.get(path.name) != _digest(path):
+                summary["rows"] += self.import_csv(path)
+                summary["imported"] += 1
+        return summary
+
+    def rows(self, where="1", params=()):
+        """Yield (row dict, file) for offers matching an SQL condition, oldest files first."""
+        cursor = self._conn.execute(
+            f"SELECT {', '.join(COLUMNS)}, file FROM offers WHERE {where} ORDER BY file, rowid", params
+        )
+        for values in cursor:
+            yield dict(zip(COLUMNS, map(_cell, values[:-1]))), values[-1]
+
+    def update_liveness(self, live, now, keep_open=None, ttl_days=None) -> RunDiff:
+        """
+        Diff `live`, {offer id: (company, source, title, url, search_query)}
+        of the offers listed this run, against the offers open after the
+        previous run. New and reopened offers are marked open, offers still
+        listed get last_seen = `now` and the query that found them, and
+        missing ones are closed unless keep_open(company, source,
+        search_query, last_seen) says their absence proves nothing. Offers
+        last seen more than `ttl_days` days before are forgotten first.
+        Returns RunDiff(appeared ids, still open ids, closed [(id, company, title, url)]).
+        """
+        if ttl_days:
+            before = (datetime.fromisoformat(now) - timedelta(days=ttl_days)).isoformat()
+            with self._conn:
+                self._conn.execute("DELETE FROM liveness WHERE last_seen < ?", (before,))
+        previous = {
+            offer_id: (company, source, title, url, search_query, last_seen)
+            for offer_id, company, source, title, url, search_query, last_seen in self._conn.execute(
+                "SELECT id, company, source, title, url, search_query, last_seen FROM liveness WHERE status = 'open'"
+            )
+        }
+        appeared = live.keys() - previous.keys()
+        still_open = live.keys() & previous.keys()
+        closed = [
+            (offer_id, company, title, url)
+            for offer_id, (company, source, title, url, search_query, last_seen) in previous.items()
+            if offer_id not in live and not (keep_open and keep_open(company, source, search_query, last_seen))
+        ]
+        with self._conn:
+            self._conn.executemany(
+                "INSERT INTO liveness (id, company, source, title, url, search_query, status, first_seen, last_seen) "
+                "VALUES (?, ?, ?, ?, ?, ?, 'open', ?, ?) "
+                "ON CONFLICT (id) DO UPDATE SET status = 'open', last_seen = excluded.last_seen, "
+                "closed_at = NULL, search_query = excluded.search_query",
+                ((offer_id, *live[offer_id], now, now) for offer_id in appeared),
+            )
+            self._conn.executemany(
+                "UPDATE liveness SET last_seen = ?, search_query = ? WHERE id = ?",
+                ((now, live[offer_id][4], offer_id) for offer_id in still_open),
+            )
+            self._conn.executemany(
+                "UPDATE liveness SET status = 'closed', closed_at = ? WHERE id = ?",
+                ((now, offer_id) for offer_id, *_ in closed),
+            )
+        return RunDiff(appeared, still_open, closed)
+
+    def query_stats(self) -> list:
+        """(company, platform, query, runs, requests, new_offers) of every query run so far."""
+        return self._conn.execute(
+            "SELECT company, platform, query, runs, requests, new_offers FROM query_stats"
+        ).fetchall()
+
+    def record_query_stats(self, executed, since, aggregator_sources=()):
+        """
+        Add one run of each (company, platform, query, requests) in `executed`,
+        crediting it with the offers saved since `since` (ISO timestamp) whose
+        search_query it is. Aggregator offers are not counted: their search
+        terms can be the same strings as a company's own queries.
+        """
+        aggregator_sources = list(aggregator_sources)
+        new_offers = {
+            (company, query): count
+            for company, query, count in self._conn.execute(
+                "SELECT company, search_query, COUNT(*) FROM offers "
+                "WHERE date_scraped >= ? AND search_query != '' "
+                f"AND source NOT IN ({', '.join('?' * len(aggregator_sources))}) "
+                "GROUP BY company, search_query",
+                [since, *aggregator_sources],
+            )
+        }
+        with self._conn:
+            self._conn.executemany(
+                "INSERT INTO query_stats VALUES (?, ?, ?, 1, ?, ?, ?) "
+                "ON CONFLICT (company, query) DO UPDATE SET platform = excluded.platform, "
+                "runs = runs + 1, requests = requests + excluded.requests, "
+                "new_offers = new_offers + excluded.new_offers, last_run = excluded.last_run",
+                (
+                    (company, platform, query, requests, new_offers.get((company, query), 0), since)
+                    for company, platform, query, requests in executed
+                ),
+            )
+
+    def read_postings(self) -> list:
+        """(company, posting id) of every posting a result page listed in earlier runs."""
+        return self._conn.execute("SELECT company, posting FROM postings_read").fetchall()
+
+    def record_postings(self, postings, now, ttl_days=None):
+        """
+        Record (company, posting id) pairs read at `now` (ISO timestamp) and
+        forget postings last read more than `ttl_days` days before.
+        """
+        with self._conn:
+            self._conn.executemany(
+                "INSERT INTO postings_read VALUES (?, ?, ?) "
+                "ON CONFLICT (company, posting) DO UPDATE SET last_read = excluded.last_read",
+                ((company, posting, now) for company, posting in postings),
+            )
+            if ttl_days:
+                before = (datetime.fromisoformat(now) - timedelta(days=ttl_days)).isoformat()
+                self._conn.execute("DELETE FROM postings_read WHERE last_read < ?", (before,))
+
+    def search(self, text="", company="", location="", source=None, since=None, min_score=None,
+               region=None, accepted_only=False, status=None, sort=None, limit=20) -> list:
+        """
+        Offers matching every word of `text` (title, snippet, company or
+        location; accents and case ignored), of `company` and of `location`,
+        scraped on or after `since` (ISO date), with the given source and
+        minimum relevance_score. `region` ("prime"/"hub") and `accepted_only`
+        apply the JobFilter location rules; `status` ("open"/"closed") keeps
+        offers in that state after the last run. Sorted by `sort` (SORT_ORDERS;
+        default: best match when searching words, else highest score).
+        Returns [(row dict, file)].
+        """
+        match = " ".join(filter(None, [
+            _phrases(text), _phrases(company, "company"), _phrases(location, "location"),
+        ]))
+        conditions, params = [], []
+        if match:
+            conditions.append("offers_fts MATCH ?")
+            params.append(match)
+        if source:
+            conditions.append("o.source = ?")
+            params.append(source)
+        if since:
+            conditions.append("o.date_scraped >= ?")
+            params.append(since)
+        if min_score is not None:
+            conditions.append("o.relevance_score >= ?")
+            params.append(min_score)
+        if region:
+            conditions.append("location_region(o.location) = ?")
+            params.append(region)
+        if accepted_only:
+            conditions.append("location_status(o.location) != 'excluded'")
+        if status:
+            conditions.append("l.status = ?")
+            params.append(status)
+
+        # Company and location words narrow the match but don't make it a relevance search
+        sort = sort or ("match" if _phrases(text) else "score")
+        if sort == "match" and not match:
+            sort = "score"
+        source_sql = "offers o"
+        rank = "0"
+        if match:
+            source_sql = "offers_fts JOIN offers o ON o.rowid = offers_fts.rowid"
+            rank = f"bm25(offers_fts, {', '.join(map(str, SEARCH_WEIGHTS))})"
+        # Liveness describes the latest occurrence of an offer; earlier ones keep their CSV status
+        source_sql += (
+            " LEFT JOIN liveness l ON l.id = o.id"
+            " AND o.file = (SELECT MAX(file) FROM offers latest WHERE latest.id = o.id)"
+        )
+        cursor = self._conn.execute(
+            f"SELECT {', '.join(LIVE_COLUMNS.get(name, 'o.' + name) for name in COLUMNS)}, o.file, "
+            f"{rank} AS match_rank "
+            f"FROM {source_sql} WHERE {' AND '.join(conditions) or '1'} "
+            f"ORDER BY {SORT_ORDERS[sort]} LIMIT ?",
+            params + [limit],
+        )
+        return [(dict(zip(COLUMNS, map(_cell, values[:-2]))), values[-2]) for values in cursor]
+
+    def close(self):
+        self._conn.close()
@@ -0,0 +1,38 @@
+"""
+Raw postings read from each company's result pages, whatever the filter
+later decided about them.
+
+A search sorted newest first only lists postings older than the first one
+an earlier run read once paging reaches it, so scrapers stop at a page
+whose postings were all read by earlier runs. The saved-offer hashes
+(DeduplicationManager) cannot answer that: they only hold offers that
+passed JobFilter, and most result pages also list other desks, locations
+or non-finance roles. Keys are the platform's posting ids, kept in the
+offer store (OfferStore.read_postings) between runs.
+"""
+
+import threading
+
+
+class PostingLog:
+    """Posting keys per company: those read by earlier runs, and those read this run."""
+
+    def __init__(self, previous=()):
+        self._previous = {}  # company -> keys read by earlier runs
+        for company, key in previous:
+            self._previous.setdefault(company, set()).add(key)
+        self._read = {}  # company -> keys read this run
+        self._lock = threading.Lock()
+
+    def read_page(self, company, keys) -> bool:
+        """Record the posting keys of a result page; True if earlier runs had read every one."""
+        keys = list(keys)
+        with self._lock:
+            self._read.setdefault(company, set()).update(keys)
+        previous = self._previous.get(company, ())
+        return bool(keys) and all(key in previous for key in keys)
+
+    def read(self) -> list:
+        """(company, key) of every posting read this run."""
+        with self._lock:
+            return [(company, key) for company, keys in self._read.items() for key in keys]
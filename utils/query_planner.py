@@ -0,0 +1,177 @@
+"""
+Choice and order of the search queries each scraper runs.
+
+Scrapers used to run the first 10-15 entries of the prefix x keyword
+product, so only "stage <keyword>" queries ever ran. The planner ranks
+every candidate query of a company by its historical yield (new offers
+saved per request, see OfferStore.query_stats), falling back to the
+yield of the same query on other companies of the platform, keeps a
+share of each plan for queries the company has never run, and cuts the
+plan at a request budget. A plan also stops once `patience` successive
+queries bring no posting the run had not already seen.
+"""
+
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+def _interleave(main, extra) -> list:
+    """Spread `extra` evenly through `main`, keeping both orders."""
+    positions = [((i + 1) / (len(main) + 1), 0, q) for i, q in enumerate(main)]
+    positions += [((j + 1) / (len(extra) + 1), 1, q) for j, q in enumerate(extra)]
+    return [q for _, _, q in sorted(positions, key=lambda p: p[:2])]
+
+
+class QueryPlan:
+    """
+    Iterator over one company's queries, best first. Call record() after
+    each query; iteration stops at the request budget or after `patience`
+    queries in a row found nothing new.
+    """
+
+    def __init__(self, company, platform, queries, request_budget, patience, request_count=None,
+                 failure_count=None):
+        self.company = company
+        self.platform = platform
+        self.queries = queries
+        self.request_budget = request_budget
+        self.patience = patience
+        self._request_count = request_count or (lambda: 0)
+        self._failure_count = failure_count or (lambda: 0)
+        self._started_at = 0
+        self._failures_at = 0
+        self.requests = {}  # query -> requests made
+        self.incomplete = set()  # queries whose results were not read to the end
+        self.used = 0
+        self.streak = 0
+
+    @property
+    def stopped(self) -> bool:
+        return self.used >= self.request_budget or self.streak >= self.patience
+
+    def __iter__(self):
+        for i, query in enumerate(self.queries):
+            if self.stopped:
+                reason = "request budget" if self.used >= self.request_budget else "no new postings"
+                logger.info(f"[{self.company}] Query plan stopped after {i}/{len(self.queries)} queries ({reason})")
+                return
+            self._started_at = self._request_count()
+            self._failures_at = self._failure_count()
+            yield query
+
+    def record(self, query, unseen, requests=None, complete=True):
+        """
+        Account for a query that returned `unseen` postings not seen earlier
+        in the run, in `requests` requests (default: the scraper's request
+        counter since the query started; a failed request then makes the
+        query incomplete). `complete=False` marks a query whose results were
+        not read to the end.
+        """
+        if requests is None:
+            requests = self._request_count() - self._started_at
+            complete = complete and self._failure_count() == self._failures_at
+        self.requests[query] = self.requests.get(query, 0) + requests
+        self.used += requests
+        self.streak = 0 if unseen else self.streak + 1
+        if not complete:
+            self.incomplete.add(query)
+
+
+class QueryPlanner:
+    """
+    Builds QueryPlans from per-(company, query) history: rows of
+    (company, platform, query, runs, requests, new_offers). Shared by all
+    scrapers of a run, it remembers what each plan ran.
+    """
+
+    def __init__(self, stats=(), request_budget=40, patience=3, explore_share=0.25, smoothing=2.0):
+        self.request_budget = request_budget
+        self.patience = patience
+        self.explore_share = explore_share
+        self.smoothing = smoothing
+        self._company = {}  # (company, query) -> (runs, requests, new offers)
+        self._platform = {}  # (platform, query) -> [requests, new offers]
+        total_requests = total_new = 0
+        for company, platform, query, runs, requests, new_offers in stats:
+            self._company[company, query] = (runs, requests, new_offers)
+            totals = self._platform.setdefault((platform, query), [0, 0])
+            totals[0] += requests
+            totals[1] += new_offers
+            total_requests += requests
+            total_new += new_offers
+        self._mean_yield = total_new / total_requests if total_requests else 0.0
+        self._plans = []
+        self._incomplete = set()  # (company, query) of unplanned searches not read to the end
+        self._lock = threading.Lock()
+
+    def _yield(self, company, platform, query) -> float:
+        """New offers per request, smoothed towards the platform's yield, itself towards the mean."""
+        k = self.smoothing
+        p_requests, p_new = self._platform.get((platform, query), (0, 0))
+        prior = (p_new + k * self._mean_yield) / (p_requests + k)
+        _, c_requests, c_new = self._company.get((company, query), (0, 0, 0))
+        return (c_new + k * prior) / (c_requests + k)
+
+    def _cost(self, company, query) -> float:
+        runs, requests, _ = self._company.get((company, query), (0, 0, 0))
+        return requests / runs if runs and requests else 1.0
+
+    def plan(self, company, platform, queries, max_queries, request_count=None, failure_count=None) -> QueryPlan:
+        """
+        Best `max_queries` of `queries` (given in cold-start order) for a
+        company: tried queries by yield, with about `explore_share` of the
+        plan spread through them for queries never run here (best platform
+        yield first), within the request budget.
+        """
+        tried = [q for q in queries if (company, q) in self._company]
+        untried = [q for q in queries if (company, q) not in self._company]
+        tried.sort(key=lambda q: -self._yield(company, platform, q))
+        untried.sort(key=lambda q: -self._yield(company, platform, q))
+
+        explore = min(len(untried), max(1, round(max_queries * self.explore_share)))
+        exploit = min(len(tried), max_queries - explore)
+        explore = min(len(untried), max_queries - exploit)
+        chosen = _interleave(tried[:exploit], untried[:explore])
+
+        planned, cost = [], 0.0
+        for query in chosen:
+            if planned and cost >= self.request_budget:
+                break
+            planned.append(query)
+            cost += self._cost(company, query)
+
+        query_plan = QueryPlan(
+            company, platform, planned, self.request_budget, self.patience, request_count, failure_count
+        )
+        with self._lock:
+            self._plans.append(query_plan)
+        return query_plan
+
+    def executed(self) -> list:
+        """(company, platform, query, requests) of every query run so far."""
+        with self._lock:
+            plans = list(self._plans)
+        return [
+            (p.company, p.platform, query, requests) for p in plans for query, requests in p.requests.items()
+        ]
+
+    def mark_incomplete(self, company, query=""):
+        """Record that a search outside any plan (query "": listing or facet search) stopped early or failed."""
+        with self._lock:
+            self._incomplete.add((company, query))
+
+    def fully_searched(self, company, query) -> bool:
+        """
+        Whether the results of `query` were read to the end for `company`
+        this run: planned queries must have run, unplanned searches ("")
+        count as read unless marked incomplete.
+        """
+        with self._lock:
+            if (company, query) in self._incomplete:
+                return False
+            plans = [p for p in self._plans if p.company == company]
+        if not query:
+            return True
+        return any(query in p.requests and query not in p.incomplete for p in plans)
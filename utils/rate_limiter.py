@@ -0,0 +1,114 @@
+import asyncio
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+
+def host_of(url: str) -> str:
+    """Return the netloc used as rate-limit key ("https://a.com/x" -> "a.com")."""
+    if "//" not in url:
+        url = f"//{url}"
+    return urlparse(url).netloc.lower()
+
+
+def parse_retry_after(value):
+    """Parse a Retry-After header (delta-seconds or HTTP-date) into seconds, or None."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+class TokenBucket:
+    """
+    Token bucket for a single host.
+    Up to `burst` requests can go out back to back, then tokens refill at one
+    every random.uniform(min_delay, max_delay) seconds. Waits are reserved
+    under a lock, so one bucket can be shared by threads and asyncio tasks.
+    """
+
+    def __init__(self, min_delay: float, max_delay: float, burst: int = 1):
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.burst = max(1, int(burst))
+        self._lock = threading.Lock()
+        self._next_free = 0.0  # time at which the bucket is empty again (GCRA form)
+        self._blocked_until = 0.0
+
+    def reserve(self) -> float:
+        """Take a token and return how many seconds the caller must wait before sending."""
+        with self._lock:
+            now = time.monotonic()
+            tolerance = (self.burst - 1) * (self.min_delay + self.max_delay) / 2
+            start = max(now, self._next_free - tolerance, self._blocked_until)
+            self._next_free = max(self._next_free, start) + random.uniform(self.min_delay, self.max_delay)
+            return start - now
+
+    def block(self, seconds: float):
+        """Hold every request to this host for `seconds` (e.g. after a 429)."""
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+    def wait(self):
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    async def wait_async(self):
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class HostRateLimiter:
+    """
+    Per-host (netloc) politeness limiter shared by all scrapers.
+    Requests to different hosts never wait on each other. Hosts use the
+    default limits unless overridden with configure(), e.g. from a company's
+    "rate_limit" entry in config/companies.py.
+    """
+
+    def __init__(self, min_delay: float = 1.0, max_delay: float = 3.0, burst: int = 1):
+        self.defaults = {"min_delay": min_delay, "max_delay": max_delay, "burst": burst}
+        self._overrides = {}
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def configure(self, url: str, **limits):
+        """Override min_delay / max_delay / burst for the host of `url`."""
+        unknown = set(limits) - set(self.defaults)
+        if unknown:
+            raise ValueError(f"Unknown rate limit option(s): {', '.join(sorted(unknown))}")
+        host = host_of(url)
+        with self._lock:
+            self._overrides[host] = {**self._overrides.get(host, {}), **limits}
+            self._buckets.pop(host, None)
+
+    def bucket(self, url: str) -> TokenBucket:
+        host = host_of(url)
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = TokenBucket(**{**self.defaults, **self._overrides.get(host, {})})
+                self._buckets[host] = bucket
+            return bucket
+
+    def wait(self, url: str):
+        self.bucket(url).wait()
+
+    async def wait_async(self, url: str):
+        await self.bucket(url).wait_async()
+
+    def block(self, url: str, seconds: float):
+        self.bucket(url).block(seconds)
@@ -0,0 +1,142 @@
+"""
+Canonical form of offer URLs, used by DeduplicationManager.compute_hash so
+the same posting reached through tracking parameters, redirect wrappers,
+trailing slashes or locale path segments hashes to the same key.
+"""
+
+import re
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Query parameters that never identify a posting
+TRACKING_PARAMS = {
+    "trk", "trkinfo", "trackingid", "refid", "lipi", "midtoken", "midsig",
+    "gclid", "fbclid", "msclkid", "mc_cid", "mc_eid", "_hsenc", "_hsmi",
+}
+TRACKING_PREFIXES = ("utm_",)
+
+_LOCALE_SEGMENT = re.compile(r"^[a-z]{2}(?:[-_][a-z]{2})?$", re.IGNORECASE)
+_LINKEDIN_JOB_ID = re.compile(r"/jobs/view/(?:[^/]*?-)?(\d+)/?$")
+_SMARTRECRUITERS_JOB = re.compile(r"^/([^/]+)/(\d+)")
+
+
+def _is_tracking(name: str) -> bool:
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES)
+
+
+def _clean_query(query: str) -> str:
+    """Drop tracking parameters and sort the rest."""
+    params = [(k, v) for k, v in parse_qsl(query, keep_blank_values=True) if not _is_tracking(k)]
+    return urlencode(sorted(params))
+
+
+def _param(query: str, name: str):
+    for key, value in parse_qsl(query):
+        if key.lower() == name:
+            return value
+    return None
+
+
+def _without_locale(path: str) -> str:
+    """Drop a leading locale segment (/en-US/, /fr/)."""
+    parts = path.split("/")
+    if len(parts) > 2 and _LOCALE_SEGMENT.match(parts[1]):
+        del parts[1]
+    return "/".join(parts)
+
+
+def _linkedin(host, path, query):
+    job_id = _param(query, "currentjobid")
+    match = _LINKEDIN_JOB_ID.search(path)
+    if match:
+        job_id = match.group(1)
+    if job_id:
+        return "www.linkedin.com", f"/jobs/view/{job_id}", ""
+    return host, path, _clean_query(query)
+
+
+def _indeed(host, path, query):
+    # viewjob, rc/clk, pagead/clk and m/viewjob all carry the job key in jk (or vjk)
+    job_key = _param(query, "jk") or _param(query, "vjk")
+    if job_key:
+        return host, "/viewjob", urlencode({"jk": job_key})
+    return host, path, _clean_query(query)
+
+
+def _glassdoor(host, path, query):
+    listing_id = _param(query, "jl") or _param(query, "joblistingid")
+    if listing_id:
+        return host, "/job-listing/j", urlencode({"jl": listing_id})
+    return host, path, _clean_query(query)
+
+
+def _workday(host, path, query):
+    return host, _without_locale(path), _clean_query(query)
+
+
+def _smartrecruiters(host, path, query):
+    # /Company/743999999999999-some-title -> /Company/743999999999999
+    match = _SMARTRECRUITERS_JOB.match(path)
+    if match:
+        return host, f"/{match.group(1)}/{match.group(2)}", ""
+    return host, path, _clean_query(query)
+
+
+def _welcometothejungle(host, path, query):
+    # Job pages exist under every locale (/fr/, /en/, ...); their query is only search context
+    path = _without_locale(path)
+    if "/jobs/" in path:
+        return host, path, ""
+    return host, path, _clean_query(query)
+
+
+# Host pattern -> rule of the source, checked in order
+SOURCE_RULES = [
+    (re.compile(r"(^|\.)linkedin\.com$"), _linkedin),
+    (re.compile(r"(^|\.)indeed\.com$"), _indeed),
+    (re.compile(r"(^|\.)glassdoor\.[a-z.]+$"), _glassdoor),
+    (re.compile(r"\.myworkdayjobs\.com$"), _workday),
+    (re.compile(r"(^|\.)smartrecruiters\.com$"), _smartrecruiters),
+    (re.compile(r"(^|\.)welcometothejungle\.com$"), _welcometothejungle),
+]
+
+
+def _rule_for(host):
+    for pattern, rule in SOURCE_RULES:
+        if pattern.search(host):
+            return rule
+    return None
+
+
+def canonical_url(url: str) -> str:
+    """
+    Canonical form of an offer URL: lowercase scheme/host, no fragment,
+    default port, tracking parameters or trailing slash, then the rule of
+    the source (job id only for LinkedIn/Indeed/Glassdoor/SmartRecruiters,
+    no locale segment for Workday/Welcome to the Jungle).
+    """
+    url = (url or "").strip()
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return url
+    if not parts.netloc:
+        return url
+
+    scheme = parts.scheme.lower() or "https"
+    host = parts.hostname or ""
+    if port and port not in (80, 443):
+        host = f"{host}:{port}"
+    path = parts.path or "/"
+    query = parts.query
+
+    rule = _rule_for(host)
+    if rule is not None:
+        host, path, query = rule(host, path, query)
+    else:
+        query = _clean_query(query)
+
+    if len(path) > 1:
+        path = path.rstrip("/") or "/"
+    return urlunsplit(("https" if scheme == "http" else scheme, host, path, query, ""))